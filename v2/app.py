@@ -8,19 +8,47 @@ from chat_interface import send_message
 from agecalculatoragent import RetirementCalculator
 from longevity import longevityAgent
 from healthcost import HealthCostPredictorAgent
+from report_cache import report_cache, profile_version
+from dependencies import fields_for
+from prefetch import ReportPrefetcher, is_failed
+from report_format import OUTPUT_MODES
+from report_bundle import write_bundle
+from profile_cache import profile_cache, profile_watcher
+from tracing import traced
+from metrics import HANDLER_LATENCY, REPORTS_IN_FLIGHT, timed, start_metrics_server
+from profiling import profiled
+from llm_provider import get_provider
+import memory_guard
+from backpressure import (
+    AUTH_CONCURRENCY, BUSY_MESSAGE, CHAT_CONCURRENCY, QUEUE_MAX_SIZE, REPORT_CONCURRENCY, report_backlog,
+)
+import functools
 import os
 
 os.makedirs("reports", exist_ok=True)
 
 gemini_key = os.getenv("GENAI_KEY")
-user_json = global_session.current_user.to_dict() if global_session.current_user else {}
+# "markdown" or "html" show the report in the page and build the PDF only on
+# download; "pdf" builds it with every report like before
+REPORT_OUTPUT_MODE = os.getenv("REPORT_OUTPUT_MODE", "markdown")
+if REPORT_OUTPUT_MODE not in OUTPUT_MODES:
+    raise ValueError(f"Unknown REPORT_OUTPUT_MODE: {REPORT_OUTPUT_MODE}")
 
 agents = {
-    "retirement": RetirementCalculator(),
-    "longevity": longevityAgent(user_json),
-    "health_cost": HealthCostPredictorAgent(user_json)
+    "retirement": RetirementCalculator,
+    "longevity": longevityAgent,
+    "health_cost": HealthCostPredictorAgent
 }
 db = MongoDBConnector()
+# Keeps cached profiles in sync with Mongo writes from other processes
+profile_watcher.start()
+start_metrics_server()
+# Configure the LLM SDK once at startup rather than on the first report
+get_provider()
+# Under memory pressure cached reports and profiles are rebuilt on demand
+memory_guard.register_release_hook(report_cache.clear)
+memory_guard.register_release_hook(profile_cache.clear)
+memory_guard.start()
 
 def check_auth():
     """Check if user is authenticated"""
@@ -36,16 +64,27 @@ def signup(name_surname: str, email: str, password: str) -> tuple:
     else:
         return "Email already exists or an error occurred", gr.update(visible=True), gr.update(visible=False)
 
-def login(email, password):
+def session_id(request: gr.Request | None, user_data: dict) -> str | None:
+    """Gradio session of the request, or the user's email outside of Gradio"""
+    if request is not None and request.session_hash:
+        return request.session_hash
+    return user_data.get("email")
+
+@traced("app.login")
+@timed(HANDLER_LATENCY, handler="login")
+def login(email, password, request: gr.Request = None):
     """Handle user login"""
     if db.verify_user(email, password):
-        user_data = db.get_user(email)
-        if user_data and "_id" in user_data:
-            del user_data["_id"]
+        # Seeds the profile cache for the reports of this session
+        profile_cache.invalidate(email)
+        user_data = profile_cache.get(email)
 
         if user_data:
             global_session.current_user = User(**user_data)
             chat_interface.create_chat()
+            # Users usually open the Reports tab next, so start building them now
+            profile = get_current_user_data()
+            prefetcher.start(session_id(request, profile), profile, agents)
             return (
                 "Login successful!",
                 gr.update(visible=False),  # Hide auth container
@@ -54,36 +93,157 @@ def login(email, password):
             )
     return "Invalid email or password", gr.update(visible=True), gr.update(visible=False), *([None] * 15)
 
-def get_retirement_report():
+def build_report(name, user_data, keep_degraded=True):
+    """Return the stored report if the profile is unchanged, otherwise build a new one.
+
+    A report built from the rule-based fallback is never stored, so the next
+    click asks the LLM again; with keep_degraded=False it is not returned either.
+    """
+    email = user_data.get("email")
+    version = profile_version(user_data, fields_for(name))
+    cached = report_cache.get(email, name, version)
+    if cached:
+        return cached
+
+    agent = agents[name](user_data)
+    report, pdf_path = agent.handle_query(output_mode=REPORT_OUTPUT_MODE)
+    if agent.degraded:
+        return (report, pdf_path) if keep_degraded else None
+    # Markdown and html reports have no PDF yet; their text is cached all the same
+    if not is_failed(report):
+        report_cache.put(email, name, version, report, pdf_path)
+    return report, pdf_path
+
+# A degraded prefetch is dropped, so the click builds the report with a fresh LLM call
+prefetcher = ReportPrefetcher(functools.partial(build_report, keep_degraded=False))
+
+# Last report shown per session, so the PDF button knows what to build
+shown_reports = {}
+
+def backlog_key(request: gr.Request | None, event: str):
+    return (request.session_hash if request is not None else None, event)
+
+def releases_backlog(event):
+    """Free the slot taken by admit_report(event) when the report handler returns"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(request: gr.Request = None):
+            report_backlog.started(backlog_key(request, event))
+            try:
+                return fn(request)
+            finally:
+                report_backlog.done(backlog_key(request, event))
+        return wrapper
+    return decorator
+
+def admit_report(event):
+    """Gate run outside the queue before a report event; refuses it when the report backlog is full"""
+    def gate(request: gr.Request = None):
+        if not report_backlog.admit(backlog_key(request, event)):
+            raise gr.Error(BUSY_MESSAGE)
+    return gate
+
+def release_report_slots(request: gr.Request = None):
+    """Free a closed page's report slots; queued events it left behind never run"""
+    if request is not None:
+        report_backlog.release_session(request.session_hash)
+
+def run_agent(name, user_data, request=None):
+    """Use the report prefetched at login if it matches the profile, otherwise build it"""
+    sid = session_id(request, user_data)
+    shown_reports[sid] = name
+    with REPORTS_IN_FLIGHT.track(agent=name):
+        prefetched = prefetcher.take(sid, name, user_data)
+        if prefetched:
+            return prefetched
+        return build_report(name, user_data)
+
+@traced("app.download_pdf")
+@timed(HANDLER_LATENCY, handler="download_pdf")
+@profiled("download_pdf")
+@releases_backlog("pdf")
+def download_pdf(request: gr.Request = None):
+    """Build the PDF of the report on screen, or reuse the stored one"""
+    user_data = get_current_user_data()
+    name = shown_reports.get(session_id(request, user_data))
+    if not user_data or name is None:
+        return None
+
+    email = user_data.get("email")
+    version = profile_version(user_data, fields_for(name))
+    cached = report_cache.get(email, name, version)
+    if cached and cached[1]:
+        return cached[1]
+
+    # Sections come from the report cache, so this only renders the PDF
+    with REPORTS_IN_FLIGHT.track(agent=name):
+        agent = agents[name](user_data)
+        report, _ = agent.handle_query(output_mode=REPORT_OUTPUT_MODE)
+        pdf_path = agent.build_pdf()
+    if pdf_path and not agent.degraded:
+        report_cache.put(email, name, version, report, pdf_path)
+    return pdf_path
+
+@traced("app.report", agent="retirement")
+@timed(HANDLER_LATENCY, handler="retirement_report")
+@profiled("get_retirement_report")
+@releases_backlog("retirement")
+def get_retirement_report(request: gr.Request = None):
     user_data = get_current_user_data()
     if not user_data:
         return "Error: No user data available", None
-    agents["retirement"] = RetirementCalculator(user_data)  # if constructor takes input
-    report, pdf_path = agents["retirement"].handle_query()
-    return report,pdf_path
+    return run_agent("retirement", user_data, request)
 
 def get_current_user_data():
-    return global_session.current_user.to_dict() if global_session.current_user else {}
+    """Latest profile of the logged in user, read through the profile cache"""
+    user = global_session.current_user
+    if not user:
+        return {}
+    return profile_cache.get(user.email) or user.to_dict()
 
-def get_longevity_report():
+@traced("app.report", agent="longevity")
+@timed(HANDLER_LATENCY, handler="longevity_report")
+@profiled("get_longevity_report")
+@releases_backlog("longevity")
+def get_longevity_report(request: gr.Request = None):
     user_data = get_current_user_data()
     if not user_data:
         return "Error: No user data available", None
-    # Update the agent with current user data
-    agents["longevity"] = longevityAgent(user_data)
-    report, pdf_path = agents["longevity"].handle_query()
-    return report, pdf_path
+    return run_agent("longevity", user_data, request)
 
-def get_health_cost_report():
+@traced("app.report", agent="health_cost")
+@timed(HANDLER_LATENCY, handler="health_cost_report")
+@profiled("get_health_cost_report")
+@releases_backlog("health_cost")
+def get_health_cost_report(request: gr.Request = None):
     user_data = get_current_user_data()
     if not user_data:
         return "Error: No user data available", None
-    agents["health_cost"] = HealthCostPredictorAgent(user_data)
-    report, pdf_path = agents["health_cost"].handle_query()
-    return report, pdf_path
+    return run_agent("health_cost", user_data, request)
 
-def logout():
+@traced("app.dossier")
+@timed(HANDLER_LATENCY, handler="dossier")
+@profiled("get_dossier")
+@releases_backlog("dossier")
+def get_dossier(request: gr.Request = None):
+    """All three reports in a single PDF"""
+    user_data = get_current_user_data()
+    if not user_data:
+        return "Error: No user data available", None
+    name = user_data.get("name_surname", "user").replace(" ", "_")
+    try:
+        pdf_path = write_bundle([user_data], agents, f"reports/dossier_{name}.pdf")
+    except Exception as e:
+        print(f"Error building dossier: {str(e)}")
+        return f"Error generating dossier: {str(e)}", None
+    return "Full dossier created.", pdf_path
+
+def logout(request: gr.Request = None):
     """Handle user logout"""
+    if global_session.current_user:
+        sid = session_id(request, get_current_user_data())
+        prefetcher.discard(sid)
+        shown_reports.pop(sid, None)
     global_session.current_user = None
     return (
         gr.update(visible=True),   # Show auth container
@@ -141,6 +301,7 @@ with gr.Blocks(css="footer {visibility: hidden}") as app:
                 gr.ChatInterface(
                     fn=send_message,
                     type="messages",
+                    concurrency_limit=CHAT_CONCURRENCY,
             )
         # Reports Tab
         with gr.Tab("Reports"):
@@ -149,8 +310,15 @@ with gr.Blocks(css="footer {visibility: hidden}") as app:
                     retirement_btn = gr.Button("Retirement Report")
                     longevity_btn = gr.Button("Longevity Report")
                     health_cost_btn = gr.Button("Health Cost Report")
+                    dossier_btn = gr.Button("Full Dossier")
 
-        report_output = gr.Textbox(label="Agent Output", lines=10, interactive=False)
+        if REPORT_OUTPUT_MODE == "html":
+            report_output = gr.HTML(label="Agent Output")
+        elif REPORT_OUTPUT_MODE == "markdown":
+            report_output = gr.Markdown(label="Agent Output")
+        else:
+            report_output = gr.Textbox(label="Agent Output", lines=10, interactive=False)
+        pdf_btn = gr.Button("Create PDF", visible=REPORT_OUTPUT_MODE != "pdf")
         report_file = gr.File(label="Download Current PDF", interactive=False)
 
         gr.Markdown("### All Reports in System:")
@@ -164,22 +332,46 @@ with gr.Blocks(css="footer {visibility: hidden}") as app:
         fn=signup,
         inputs=[signup_name_surname, signup_email, signup_password],
         outputs=[signup_message, auth_container, main_container],
+        concurrency_id="auth",
+        concurrency_limit=AUTH_CONCURRENCY,
     )
 
     login_button.click(
         fn=login,
         inputs=[login_email, login_password],
         outputs=[login_message, auth_container, main_container, *profile_components],
+        concurrency_id="auth",
+        concurrency_limit=AUTH_CONCURRENCY,
     )
 
     logout_button.click(
         fn=logout,
         outputs=[auth_container, main_container, *profile_components],
+        concurrency_id="auth",
+        concurrency_limit=AUTH_CONCURRENCY,
     )
 
-    retirement_btn.click(fn=get_retirement_report, outputs=[report_output, report_file])
-    longevity_btn.click(fn=get_longevity_report, outputs=[report_output,report_file])
-    health_cost_btn.click(fn=get_health_cost_report, outputs=[report_output,report_file])
-                                                              
+    # Report events share one concurrency group; the gate runs outside the
+    # queue and refuses clicks while REPORT_MAX_WAITING reports are pending
+    report_events = [
+        (retirement_btn, "retirement", get_retirement_report, [report_output, report_file]),
+        (longevity_btn, "longevity", get_longevity_report, [report_output, report_file]),
+        (health_cost_btn, "health_cost", get_health_cost_report, [report_output, report_file]),
+        (pdf_btn, "pdf", download_pdf, report_file),
+        (dossier_btn, "dossier", get_dossier, [report_output, report_file]),
+    ]
+    for button, event, handler, outputs in report_events:
+        button.click(fn=admit_report(event), queue=False, api_name=False).success(
+            fn=handler,
+            outputs=outputs,
+            concurrency_id="reports",
+            concurrency_limit=REPORT_CONCURRENCY,
+        )
+    app.unload(release_report_slots)
+
+# Events beyond QUEUE_MAX_SIZE get Gradio's "queue is full" message instead of waiting
+app.queue(max_size=QUEUE_MAX_SIZE)
+
 if __name__ == "__main__":
-    app.launch()
+    # Every concurrency group needs its workers from the same thread pool
+    app.launch(max_threads=max(40, CHAT_CONCURRENCY + REPORT_CONCURRENCY + AUTH_CONCURRENCY + 8))
@@ -0,0 +1,68 @@
+import os
+import threading
+import time
+
+# Events run at the same time per concurrency group; slow report builds get
+# their own workers so they cannot starve chat turns or logins
+CHAT_CONCURRENCY = int(os.getenv("CHAT_CONCURRENCY", "8"))
+REPORT_CONCURRENCY = int(os.getenv("REPORT_CONCURRENCY", "2"))
+AUTH_CONCURRENCY = int(os.getenv("AUTH_CONCURRENCY", "4"))
+# Events waiting in the Gradio queue before new ones are turned away
+QUEUE_MAX_SIZE = int(os.getenv("QUEUE_MAX_SIZE", "64"))
+# Report requests admitted (running or queued) before new ones are refused
+REPORT_MAX_WAITING = int(os.getenv("REPORT_MAX_WAITING", "16"))
+# Seconds after admission, or after its handler started, at which a request
+# that never finished stops counting; about one report build, so an event the
+# queue rejected or a client that went away holds its slot only briefly
+REPORT_ADMISSION_TIMEOUT = float(os.getenv("REPORT_ADMISSION_TIMEOUT", "90"))
+
+BUSY_MESSAGE = "Reports are busy right now. Please try again in a minute."
+
+
+class Backlog:
+    """Counts requests admitted to a concurrency group, keyed by session and event.
+
+    admit() is called before an event enters the queue, started() when its
+    handler begins and done() when it finishes. A session clicking the same
+    button twice holds one slot; release_session() frees a closed session's.
+    """
+
+    def __init__(self, limit: int = REPORT_MAX_WAITING, timeout: float = REPORT_ADMISSION_TIMEOUT):
+        self.limit = limit
+        self.timeout = timeout
+        self._admitted = {}
+        self._lock = threading.Lock()
+
+    def admit(self, key) -> bool:
+        """Reserve a slot for key; False if the group is full"""
+        now = time.monotonic()
+        with self._lock:
+            for stale in [k for k, t in self._admitted.items() if now - t > self.timeout]:
+                del self._admitted[stale]
+            if key not in self._admitted and len(self._admitted) >= self.limit:
+                return False
+            self._admitted[key] = now
+            return True
+
+    def started(self, key):
+        """Restart the timeout of an admitted request once its handler runs"""
+        with self._lock:
+            if key in self._admitted:
+                self._admitted[key] = time.monotonic()
+
+    def done(self, key):
+        with self._lock:
+            self._admitted.pop(key, None)
+
+    def release_session(self, session):
+        """Free every slot of a session, e.g. when its page is closed"""
+        with self._lock:
+            for key in [k for k in self._admitted if k[0] == session]:
+                del self._admitted[key]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._admitted)
+
+
+report_backlog = Backlog()
@@ -0,0 +1,187 @@
+"""Generate reports for many users outside the Gradio UI.
+
+    python batch_reports.py --input users.jsonl --output-dir artifacts
+    python batch_reports.py --mongo --workers 8 --reports retirement longevity
+    python batch_reports.py --input users.jsonl --dry-run
+
+Users come from a JSONL file (one profile per line, shaped like
+example-user.json) or from the Mongo user collection. Every (user, report)
+pair runs in a process pool and writes <output-dir>/<user>/<report>.pdf and
+.md. Finished pairs are appended to <output-dir>/manifest.jsonl, so a rerun
+skips them and only retries what failed or never ran. A report built from
+the rule-based fallback because the LLM failed is written but recorded as
+"degraded", so it is retried too.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+REPORT_NAMES = ("retirement", "longevity", "health_cost")
+MANIFEST_NAME = "manifest.jsonl"
+# Print throughput after this many finished reports
+PROGRESS_EVERY = 50
+
+
+def load_agents() -> dict:
+    """Import the agents lazily, so LLM_BACKEND is read after --dry-run sets it"""
+    from agecalculatoragent import RetirementCalculator
+    from longevity import longevityAgent
+    from healthcost import HealthCostPredictorAgent
+    return {
+        "retirement": RetirementCalculator,
+        "longevity": longevityAgent,
+        "health_cost": HealthCostPredictorAgent,
+    }
+
+
+def read_jsonl(path: str):
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                print(f"Skipping line {line_no} of {path}: {str(e)}")
+
+
+def read_mongo():
+    from db_connector import MongoDBConnector
+    cursor = MongoDBConnector().users.find({}, {"_id": 0, "password": 0})
+    yield from cursor
+
+
+def user_key(user_data: dict, index: int) -> str:
+    """Directory name for a user's reports, stable across runs"""
+    key = user_data.get("email") or f"user_{index}"
+    return re.sub(r"[^\w.@-]", "_", str(key))
+
+
+def load_manifest(path: str) -> set:
+    """(user, report) pairs that already finished successfully"""
+    done = set()
+    if os.path.exists(path):
+        for entry in read_jsonl(path):
+            if entry.get("status") == "ok":
+                done.add((entry["user"], entry["report"]))
+    return done
+
+
+def run_report(name: str, user_data: dict, user_dir: str) -> dict:
+    """Build one report in a worker process and return its manifest entry"""
+    start = time.perf_counter()
+    entry = {"report": name}
+    try:
+        os.makedirs(user_dir, exist_ok=True)
+        agent = load_agents()[name](user_data)
+        report, _ = agent.handle_query(output_mode="markdown")
+        # handle_query reports failures as text instead of raising
+        if report.startswith("Error"):
+            raise RuntimeError(report)
+        pdf_path = agent.build_pdf(os.path.join(user_dir, f"{name}.pdf"))
+        if not pdf_path:
+            raise RuntimeError(f"No PDF written for {name}")
+        with open(os.path.join(user_dir, f"{name}.md"), "w", encoding="utf-8") as f:
+            f.write(report)
+        if agent.degraded:
+            entry.update(status="degraded", pdf=pdf_path, error="LLM insights unavailable, used the rule-based fallback")
+        else:
+            entry.update(status="ok", pdf=pdf_path)
+    except Exception as e:
+        entry.update(status="error", error=str(e))
+    entry["seconds"] = round(time.perf_counter() - start, 3)
+    return entry
+
+
+def run_batch(users, output_dir: str, reports=REPORT_NAMES, workers: int = 4, resume: bool = True,
+              max_tasks_per_child: int | None = None) -> dict:
+    """Run every report for every user and return the totals.
+
+    With max_tasks_per_child, a worker is replaced by a fresh process after
+    that many reports, so memory it accumulates is returned to the OS.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    done = load_manifest(manifest_path) if resume else set()
+
+    totals = {"ok": 0, "degraded": 0, "error": 0, "skipped": 0}
+    start = time.perf_counter()
+    # Keep a bounded number of jobs queued, so a large user source is read lazily
+    max_pending = workers * 4
+    pending = {}
+
+    def collect(futures, manifest):
+        for future in futures:
+            key = pending.pop(future)
+            entry = {"user": key, **future.result()}
+            manifest.write(json.dumps(entry) + "\n")
+            manifest.flush()
+            totals[entry["status"]] += 1
+            if entry["status"] != "ok":
+                print(f"{key} {entry['report']} {entry['status']}: {entry['error']}")
+            finished = totals["ok"] + totals["degraded"] + totals["error"]
+            if finished % PROGRESS_EVERY == 0:
+                elapsed = time.perf_counter() - start
+                print(f"{finished} reports in {elapsed:.1f}s ({finished / elapsed:.2f} reports/s)")
+
+    with ProcessPoolExecutor(max_workers=workers, max_tasks_per_child=max_tasks_per_child) as executor, \
+            open(manifest_path, "a", encoding="utf-8") as manifest:
+        for index, user_data in enumerate(users):
+            key = user_key(user_data, index)
+            for name in reports:
+                if (key, name) in done:
+                    totals["skipped"] += 1
+                    continue
+                if len(pending) >= max_pending:
+                    finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(finished, manifest)
+                future = executor.submit(run_report, name, user_data, os.path.join(output_dir, key))
+                pending[future] = key
+        collect(list(wait(pending)[0]), manifest)
+
+    totals["seconds"] = round(time.perf_counter() - start, 3)
+    built = totals["ok"] + totals["degraded"] + totals["error"]
+    totals["reports_per_second"] = round(built / totals["seconds"], 3) if totals["seconds"] else 0.0
+    return totals
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Generate reports for many users in parallel")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--input", help="JSONL file with one user profile per line")
+    source.add_argument("--mongo", action="store_true", help="read users from the Mongo user collection")
+    parser.add_argument("--output-dir", default=os.path.join("reports", "batch"),
+                        help="artifact directory (default: reports/batch)")
+    parser.add_argument("--reports", nargs="+", choices=REPORT_NAMES, default=list(REPORT_NAMES))
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4,
+                        help="worker processes; each has its own LLM rate limits")
+    parser.add_argument("--max-tasks-per-child", type=int, default=100,
+                        help="reports per worker before it is replaced (0: never)")
+    parser.add_argument("--no-resume", action="store_true", help="rebuild reports already in the manifest")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="use the stub LLM backend instead of Gemini")
+    args = parser.parse_args(argv)
+
+    if args.dry_run:
+        # Read by llm_provider at import, in this process and the workers
+        os.environ["LLM_BACKEND"] = "stub"
+        # The stub answers instantly; the real Gemini request budget would only slow the run down
+        os.environ.setdefault("LLM_RPM", "1000000")
+
+    users = read_mongo() if args.mongo else read_jsonl(args.input)
+    totals = run_batch(users, args.output_dir, args.reports, args.workers, resume=not args.no_resume,
+                       max_tasks_per_child=args.max_tasks_per_child or None)
+    print(
+        f"Done: {totals['ok']} ok, {totals['degraded']} degraded, {totals['error']} failed, "
+        f"{totals['skipped']} skipped "
+        f"in {totals['seconds']}s ({totals['reports_per_second']} reports/s)"
+    )
+    return 1 if totals["error"] or totals["degraded"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,287 @@
+"""Benchmarks for the report pipelines, run against the stub LLM backend.
+
+    python benchmarks.py                          # writes benchmarks/<commit>.json
+    python benchmarks.py --iterations 50 --output results.json
+    python benchmarks.py --compare benchmarks/abc123.json benchmarks/def456.json
+
+Each agent's handle_query is timed end to end with cold report caches and
+split into calculation, prompt building, LLM wait and PDF build. The
+calculation functions are also timed on their own over synthetic profiles.
+"""
+import os
+
+# Read by llm_provider and llm_governor at import, so set before the agents load
+os.environ["LLM_BACKEND"] = "stub"
+os.environ.setdefault("LLM_RPM", "1000000")
+os.environ.setdefault("LLM_MAX_CONCURRENCY", "64")
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from batch_reports import load_agents
+
+PHASES = ("calculation", "prompt", "llm", "pdf")
+# Relative slowdown of a median before --compare reports a regression
+REGRESSION_THRESHOLD = 0.10
+
+GENDERS = ["Male", "Female"]
+MARITAL = ["Single", "Married", "Divorced", "Widowed"]
+EDUCATION = ["High School", "Associate's Degree", "Bachelor's Degree", "Master's Degree", "Doctorate"]
+LOCATIONS = ["USA", "Europe", "Turkey", "Asia"]
+CONDITIONS = ["diabetes", "hypertension", "heart_disease", "asthma", "cancer", "obesity", "depression"]
+HABITS = ["non-smoker", "smoker", "regular exercise", "sedentary", "healthy diet", "alcohol", "meditation", "poor sleep"]
+FAMILY = ["heart disease", "cancer", "diabetes", "alzheimer", "none"]
+
+
+def synthetic_profile(rng: random.Random, index: int) -> dict:
+    """A complete, plausible profile in the shape of example-user.json"""
+    age = rng.randint(22, 64)
+    income = rng.randrange(1500, 15000, 100)
+    return {
+        "name_surname": f"Bench User {index}",
+        "email": f"bench{index}@example.com",
+        "age": age,
+        "gender": rng.choice(GENDERS),
+        "marital_status": rng.choice(MARITAL),
+        "number_of_children": rng.randint(0, 4),
+        "education_level": rng.choice(EDUCATION),
+        "occupation": "engineer",
+        "annual_working_hours": rng.choice([1040, 1600, 2080, 2400]),
+        "monthly_income": income,
+        "monthly_expenses": int(income * rng.uniform(0.4, 0.95)),
+        "debt": rng.choice([0, 5000, 20000, 80000]),
+        "assets": f"savings of ${rng.randrange(0, 400000, 1000):,}, car worth ${rng.randrange(0, 40000, 1000):,}",
+        "location": rng.choice(LOCATIONS),
+        "chronic_diseases": ", ".join(rng.sample(CONDITIONS, rng.randint(0, 2))),
+        "lifestyle_habits": ", ".join(rng.sample(HABITS, 3)),
+        "family_health_history": ", ".join(rng.sample(FAMILY, rng.randint(1, 2))),
+        "target_retirement_age": rng.randint(max(age + 1, 55), 70),
+        "target_retirement_income": rng.randrange(2000, 10000, 500),
+    }
+
+
+def summarize(samples: list) -> dict:
+    """Timing statistics in milliseconds"""
+    ordered = sorted(samples)
+    return {
+        "n": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 4),
+        "median_ms": round(statistics.median(ordered) * 1000, 4),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 4),
+        "min_ms": round(ordered[0] * 1000, 4),
+    }
+
+
+class PhaseTimer:
+    """Adds up the time spent in wrapped functions, per phase"""
+
+    def __init__(self):
+        self.totals = defaultdict(float)
+        self._patches = []
+
+    def wrap(self, owner, attr: str, phase: str):
+        original = getattr(owner, attr)
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self.totals[phase] += time.perf_counter() - start
+
+        setattr(owner, attr, timed)
+        self._patches.append((owner, attr, original))
+
+    def reset(self):
+        self.totals.clear()
+
+    def restore(self):
+        for owner, attr, original in reversed(self._patches):
+            setattr(owner, attr, original)
+        self._patches.clear()
+
+
+def instrument(timer: PhaseTimer):
+    """Wrap the entry point of every phase in the three pipelines"""
+    import agecalculatoragent
+    import longevity
+    import healthcost
+    from llm_provider import LLMProvider
+
+    timer.wrap(agecalculatoragent.RetirementCalculator, "recommend_retirement_age", "calculation")
+    timer.wrap(longevity, "static_life_expectancy_calculation", "calculation")
+    timer.wrap(healthcost.HealthCostPredictorAgent, "predict", "calculation")
+    for module in (agecalculatoragent, longevity, healthcost):
+        timer.wrap(module, "build_prompt", "prompt")
+    timer.wrap(LLMProvider, "generate", "llm")
+    timer.wrap(agecalculatoragent.ReportGenerator, "create_pdf_report", "pdf")
+    timer.wrap(longevity.longevityAgent, "save_report_to_pdf", "pdf")
+    timer.wrap(healthcost.HealthCostPredictorAgent, "save_report_to_pdf", "pdf")
+
+
+def bench_pipelines(profiles: list, iterations: int) -> dict:
+    from report_cache import report_cache
+
+    agents = load_agents()
+    timer = PhaseTimer()
+    instrument(timer)
+    results = {}
+    try:
+        for name, agent_class in agents.items():
+            totals = []
+            phases = defaultdict(list)
+            for i in range(iterations):
+                profile = profiles[i % len(profiles)]
+                # Cold run: no cached calculation or narrative from an earlier iteration
+                report_cache.invalidate(profile["email"])
+                timer.reset()
+                start = time.perf_counter()
+                # The "pdf" mode (handle_query's default) writes the PDF, so its build is timed too
+                agent_class(dict(profile)).handle_query(output_mode="pdf")
+                totals.append(time.perf_counter() - start)
+                for phase in PHASES:
+                    phases[phase].append(timer.totals[phase])
+            results[name] = {
+                "total": summarize(totals),
+                "phases": {phase: summarize(samples) for phase, samples in phases.items()},
+            }
+    finally:
+        timer.restore()
+    return results
+
+
+def time_calls(fn, args_list: list, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        for args in args_list:
+            start = time.perf_counter()
+            fn(*args)
+            samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def bench_functions(profiles: list, repeat: int) -> dict:
+    from agecalculatoragent import RetirementCalculator, UserProfile
+    from longevity import static_life_expectancy_calculation
+    from healthcost import HealthCostPredictorAgent
+
+    health_agent = HealthCostPredictorAgent(profiles[0])
+    calculator = RetirementCalculator()
+    user_profiles = [UserProfile.from_dict(p) for p in profiles]
+    return {
+        "predict": time_calls(health_agent.predict, [(p,) for p in profiles], repeat),
+        "static_life_expectancy_calculation": time_calls(
+            static_life_expectancy_calculation, [(p,) for p in profiles], repeat
+        ),
+        "calculate_financial_readiness": time_calls(
+            calculator.calculate_financial_readiness, [(p,) for p in user_profiles], repeat
+        ),
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run(iterations: int, repeat: int, profile_count: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    profiles = [synthetic_profile(rng, i) for i in range(profile_count)]
+    from llm_provider import get_provider
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            "iterations": iterations, "repeat": repeat, "profiles": profile_count, "seed": seed,
+            "stub_latency": get_provider().latency,
+        },
+        "pipelines": bench_pipelines(profiles, iterations),
+        "functions": bench_functions(profiles, repeat),
+    }
+
+
+def medians(results: dict) -> dict:
+    """Flatten a results file to {metric name: median_ms}"""
+    flat = {}
+    for name, data in results.get("pipelines", {}).items():
+        flat[f"{name}.total"] = data["total"]["median_ms"]
+        for phase, stats in data["phases"].items():
+            flat[f"{name}.{phase}"] = stats["median_ms"]
+    for name, stats in results.get("functions", {}).items():
+        flat[name] = stats["median_ms"]
+    return flat
+
+
+def compare(old_path: str, new_path: str, threshold: float = REGRESSION_THRESHOLD) -> int:
+    """Print median changes between two result files; returns the number of regressions.
+
+    Metrics present in only one file are listed as added or removed.
+    """
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    old_medians, new_medians = medians(old), medians(new)
+    print(f"{old.get('commit')} -> {new.get('commit')}")
+    regressions = 0
+    for metric in sorted(old_medians.keys() & new_medians.keys()):
+        before, after = old_medians[metric], new_medians[metric]
+        # A phase that used to take no time at all is a regression once it does
+        change = (after - before) / before if before else (float("inf") if after > before else 0.0)
+        flag = ""
+        # Sub-microsecond phases are noise
+        if change > threshold and after - before > 0.001:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(f"{metric:45} {before:12.4f} ms {after:12.4f} ms {change:+8.1%}{flag}")
+    for metric in sorted(old_medians.keys() - new_medians.keys()):
+        print(f"{metric:45} {old_medians[metric]:12.4f} ms {'':>12}    removed")
+    for metric in sorted(new_medians.keys() - old_medians.keys()):
+        print(f"{metric:45} {'':>12}    {new_medians[metric]:12.4f} ms added")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the report pipelines with the stub LLM")
+    parser.add_argument("--iterations", type=int, default=20, help="handle_query runs per agent")
+    parser.add_argument("--repeat", type=int, default=200, help="passes over the profiles per function")
+    parser.add_argument("--profiles", type=int, default=50, help="synthetic profiles")
+    parser.add_argument("--seed", type=int, default=472)
+    parser.add_argument("--output", help="results file (default: benchmarks/<commit>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two results files")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        return 1 if compare(*args.compare) else 0
+
+    results = run(args.iterations, args.repeat, args.profiles, args.seed)
+    output = args.output or os.path.join("benchmarks", f"{results['commit']}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    for name, data in results["pipelines"].items():
+        phases = ", ".join(f"{phase} {stats['median_ms']:.1f}" for phase, stats in data["phases"].items())
+        print(f"{name}: {data['total']['median_ms']:.1f} ms median ({phases})")
+    for name, stats in results["functions"].items():
+        print(f"{name}: {stats['median_ms'] * 1000:.1f} us median")
+    print(f"Results written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
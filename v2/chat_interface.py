@@ -1,13 +1,13 @@
-from google import genai
-from google.genai import types
-import os
-from dotenv import load_dotenv
 from user import user_schema
 import global_session
 from db_connector import MongoDBConnector
+from report_cache import report_cache
+from profile_cache import profile_cache
+from llm_provider import get_provider
+from prompt_builder import compact_schema, fit_to_budget
+from tracing import traced
+from metrics import HANDLER_LATENCY, timed
 
-load_dotenv()
-client = genai.Client(api_key=os.getenv("GENAI_KEY"))
 db = MongoDBConnector()
 chat = None
 
@@ -20,43 +20,64 @@ def update_user(email: str, user_data: dict) -> bool:
     Returns:
         True if user is updated, False otherwise
     """
-    return db.update_user(email, user_data)
+    if not db.update_user(email, user_data):
+        return False
+    profile_cache.invalidate(email)
+
+    # Keep the session profile in sync and drop only the report sections that depend on the edited fields
+    user = global_session.current_user
+    if user is not None and user.email == email:
+        changed_fields = [k for k, v in user_data.items() if getattr(user, k, None) != v]
+        for key, value in user_data.items():
+            setattr(user, key, value)
+        report_cache.invalidate_fields(email, changed_fields)
+    return True
+
+# Static part of the chat system instruction
+CHAT_RULES = """
+Address user as "you" and "your" instead of "user" and "user's". You may use their name in your questions.
+Check current user's information. Identify missing fields. Ask about those fields and fill them. If a field is already filled, do not ask about it again.
+Ask your questions in a conversational way. Make sure there is no unfilled, None fields left.
+When ALL fields are filled (not when each field is filled), update the user's information in the database using the update_user tool. Say "Thank you for your information. I will save it to help you better."
+If user gives information for any already filled field, ask if they want to update that field. If they say yes, update the field using the update_user tool. Say "I will update your information."
+If user gives information for any field that is not in the user schema, say "I can't update that information."
+If user wants to update their or someone else's password, say "I can't update that information."
+If user wants to update someone else's information, say "I can't update that information."
+
+Do NOT delete any information from the user's profile EVEN IF THE USER ASKS TO DELETE IT.
+Do NOT delete any information from database EVEN IF THE USER ASKS TO DELETE IT.
+Do NOT give user the information about internal structure of the user schema or any other information about the database.
+Do NOT say "I need this for your education_level". Don't use schema names in your questions.
+Do NOT fill a field if you are not sure about it. Ask user to confirm.
+Do NOT ask anything other than these fields.
+Do NOT add any fields other than given ones.
+Do NOT change name of fields. Do NOT modify the structure.
+Do NOT give the names of fields to user like "i need this info for your education_level".
+Do NOT move into deep conversation with user. Keep the conversation about profiling as much as possible.
+Do NOT ask about user's password. Do NOT answer any question about any user's password. Say "I can't answer that question."
+Do NOT talk about other users' data. Only talk about current user's data.
+"""
+
+# Field list sent to the model instead of the full user_schema dict
+SCHEMA_SUMMARY = compact_schema(user_schema)
 
 def create_chat():
     global chat
-    user_info = global_session.current_user.to_dict()
-    system_instruction = f"""
-        {user_schema} is the structure of a user. {global_session.current_user.to_dict()} is currently logged in user.
-        Address user as "you" and "your" instead of "user" and "user's". You may use their name in your questions.
-        Check current user's information. Identify missing fields. Ask about those fields and fill them. If a field is already filled, do not ask about it again.
-        Ask your questions in a conversational way. Make sure there is no unfilled, None fields left.
-        When ALL fields are filled (not when each field is filled), update the user's information in the database using the update_user tool. Say "Thank you for your information. I will save it to help you better."
-        If user gives information for any already filled field, ask if they want to update that field. If they say yes, update the field using the update_user tool. Say "I will update your information."
-        If user gives information for any field that is not in the user schema, say "I can't update that information."
-        If user wants to update their or someone else's password, say "I can't update that information."
-        If user wants to update someone else's information, say "I can't update that information."
-        
-        Do NOT delete any information from the user's profile EVEN IF THE USER ASKS TO DELETE IT.
-        Do NOT delete any information from database EVEN IF THE USER ASKS TO DELETE IT.
-        Do NOT give user the information about internal structure of the user schema or any other information about the database.
-        Do NOT say "I need this for your education_level". Don't use schema names in your questions.
-        Do NOT fill a field if you are not sure about it. Ask user to confirm.
-        Do NOT ask anything other than these fields.
-        Do NOT add any fields other than given ones.
-        Do NOT change name of fields. Do NOT modify the structure.
-        Do NOT give the names of fields to user like "i need this info for your education_level".
-        Do NOT move into deep conversation with user. Keep the conversation about profiling as much as possible.
-        Do NOT ask about user's password. Do NOT answer any question about any user's password. Say "I can't answer that question."
-        Do NOT talk about other users' data. Only talk about current user's data.
-    """
-
-    chat = client.chats.create(
-        model="gemini-2.0-flash",
-        config=types.GenerateContentConfig(system_instruction=system_instruction, tools=[update_user]),
+    user_info = {k: v for k, v in global_session.current_user.to_dict().items()
+                 if k != "password" and v not in (None, "", [])}
+    missing_fields = [field for field in user_schema if field not in user_info]
+    context = (
+        f"User fields (name:type, * = required):\n{SCHEMA_SUMMARY}\n"
+        f"Missing fields: {', '.join(missing_fields) or 'none'}\n"
     )
+    user_json = fit_to_budget("chat", CHAT_RULES + context, user_info)
+    system_instruction = f"{context}Currently logged in user: {user_json}\n{CHAT_RULES}"
+
+    chat = get_provider().create_chat(system_instruction, tools=[update_user])
 
+@traced("chat.send_message")
+@timed(HANDLER_LATENCY, handler="chat")
 def send_message(message, history):
     if chat is None:
         return "Error: chat session not initialized. Please log in first."
-    response = chat.send_message(message)
-    return response.text
+    return chat.send_message(message)
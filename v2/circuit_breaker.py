@@ -0,0 +1,152 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from report_cache import report_cache, REPORT
+
+# A report LLM call slower than this counts as a failure and the caller stops waiting
+LLM_LATENCY_SLO = float(os.getenv("LLM_LATENCY_SLO", "20"))
+# Consecutive failures before the breaker opens
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "3"))
+# Seconds the breaker stays open before letting a trial call through
+LLM_BREAKER_RESET = float(os.getenv("LLM_BREAKER_RESET", "30"))
+# How many times a missing narrative is retried in the background
+LLM_REFILL_ATTEMPTS = int(os.getenv("LLM_REFILL_ATTEMPTS", "20"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class LLMUnavailable(Exception):
+    """Raised when the LLM backend is too slow or the breaker is open"""
+
+
+class CircuitBreaker:
+    """Stops calling a backend that keeps failing or missing its latency SLO.
+
+    closed: calls go through; failures are counted
+    open: calls fail immediately with LLMUnavailable until reset_timeout passed
+    half_open: a single trial call decides whether to close or reopen
+    """
+
+    def __init__(self, name: str, failure_threshold: int = LLM_BREAKER_FAILURES,
+                 reset_timeout: float = LLM_BREAKER_RESET, latency_slo: float = LLM_LATENCY_SLO):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.latency_slo = latency_slo
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+        # Calls run here so the caller can stop waiting after the SLO
+        self._executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix=f"llm-{name}")
+
+    def allow(self) -> bool:
+        """Return True if a call may be attempted now"""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def check(self):
+        """Raise LLMUnavailable unless a call may be attempted now"""
+        if not self.allow():
+            raise LLMUnavailable(f"{self.name} circuit is open")
+
+    def call(self, fn):
+        """Run fn() within the latency SLO or raise LLMUnavailable"""
+        self.check()
+        return self.run(fn)
+
+    def run(self, fn):
+        """Run fn() within the latency SLO and record the outcome; check() must have passed.
+
+        fn keeps running in the breaker's executor after a timeout, so it
+        must release whatever it holds itself.
+        """
+        future = self._executor.submit(fn)
+        try:
+            result = future.result(timeout=self.latency_slo)
+        except FutureTimeout:
+            self.record_failure()
+            raise LLMUnavailable(f"{self.name} did not answer within {self.latency_slo:.0f}s")
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Return the breaker of a backend, one per backend name"""
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name)
+        return _breakers[name]
+
+
+_pending_refills = set()
+_pending_lock = threading.Lock()
+
+
+def fill_when_recovered(email, agent, section, user_data, compute, is_valid=None):
+    """Regenerate a narrative in the background once the LLM answers again.
+
+    The result is stored in the report cache and the stored report of the
+    agent is dropped, so the next click rebuilds it with the real narrative.
+    """
+    if not email:
+        return
+    key = (email, agent, section)
+    with _pending_lock:
+        if key in _pending_refills:
+            return
+        _pending_refills.add(key)
+
+    def refill():
+        try:
+            for _ in range(LLM_REFILL_ATTEMPTS):
+                time.sleep(LLM_BREAKER_RESET)
+                try:
+                    value = compute()
+                except LLMUnavailable:
+                    continue
+                except Exception as e:
+                    print(f"Error refilling {agent} {section}: {str(e)}")
+                    return
+                if is_valid is None or is_valid(value):
+                    report_cache.put_section(email, agent, section, user_data, value)
+                    report_cache.invalidate(email, agent, REPORT)
+                    return
+        finally:
+            with _pending_lock:
+                _pending_refills.discard(key)
+
+    threading.Thread(target=refill, daemon=True, name=f"refill-{agent}").start()
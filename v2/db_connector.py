@@ -1,11 +1,49 @@
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateOne
+from pymongo.errors import BulkWriteError
 from dotenv import load_dotenv
+import json
 import os
-from user import User  # Import the User class
+from user import User, user_schema  # Import the User class
+from dependencies import canonical_profile
+from tracing import traced
+from metrics import MONGO_LATENCY, timed
 
 # Load environment variables
 load_dotenv()
 
+# Documents sent per insert_many/bulk_write call by import_users
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "1000"))
+DUPLICATE_KEY_ERROR = 11000
+
+
+def validate_user(user_data: dict) -> list[str]:
+    """Return the problems with a user document, checked against user_schema.
+
+    Only name_surname and email are mandatory, like for signup; every other
+    schema field is checked for its type and options when present. Legacy
+    spellings in FIELD_ALIASES are checked under their schema names; any
+    other field outside the schema (and password) is a problem, since
+    User(**profile) would reject the document at login.
+    """
+    if not isinstance(user_data, dict):
+        return ["not a JSON object"]
+    user_data = canonical_profile(user_data)
+    errors = [f"missing {field}" for field in ("name_surname", "email") if not user_data.get(field)]
+    errors += [f"unknown field {field}" for field in user_data
+               if field not in user_schema and field not in ("password", "_id")]
+    for field, spec in user_schema.items():
+        value = user_data.get(field)
+        if value is None:
+            continue
+        if spec.get("type") == "integer":
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                errors.append(f"{field} must be a number")
+        elif not isinstance(value, str):
+            errors.append(f"{field} must be a string")
+        elif spec.get("options") and value not in spec["options"]:
+            errors.append(f"{field} must be one of {', '.join(spec['options'])}")
+    return errors
+
 
 class MongoDBConnector:
     _instance = None
@@ -23,6 +61,8 @@ class MongoDBConnector:
             ]
         return cls._instance
 
+    @traced("mongo.add_user")
+    @timed(MONGO_LATENCY, operation="add_user")
     def add_user(self, name_surname: str, email: str, password: str) -> bool:
         """Add a new user to the database"""
         try:
@@ -40,6 +80,8 @@ class MongoDBConnector:
             print(f"Error adding user: {e}")
             return False
 
+    @traced("mongo.verify_user")
+    @timed(MONGO_LATENCY, operation="verify_user")
     def verify_user(self, email: str, password: str) -> bool:
         """Verify user credentials"""
         try:
@@ -49,6 +91,8 @@ class MongoDBConnector:
             print(f"Error verifying user: {e}")
             return False
 
+    @traced("mongo.get_user")
+    @timed(MONGO_LATENCY, operation="get_user")
     def get_user(self, email: str) -> dict | None:
         """Retrieve user details from the database by email."""
         try:
@@ -63,6 +107,8 @@ class MongoDBConnector:
             print(f"Error retrieving user: {e}")
             return None
         
+    @traced("mongo.update_user")
+    @timed(MONGO_LATENCY, operation="update_user")
     def update_user(self, email: str, user_data: dict) -> bool:
         """ Update user details in the database.
             Args:
@@ -77,3 +123,90 @@ class MongoDBConnector:
         except Exception as e:
             print(f"Error updating user: {e}")
             return False
+
+    @traced("mongo.import_users")
+    @timed(MONGO_LATENCY, operation="import_users")
+    def import_users(self, users, batch_size: int = BULK_BATCH_SIZE, update_existing: bool = False) -> dict:
+        """ Import many users with one round trip per batch.
+            Args:
+                users: iterable of user dicts, e.g. parsed JSONL lines
+                batch_size: documents per insert_many/bulk_write call
+                update_existing: update users whose email already exists instead of skipping them
+            Returns:
+                counts of inserted, updated, duplicate and invalid users; "errors" holds
+                (position, problems) for each invalid user
+        """
+        summary = {"inserted": 0, "updated": 0, "duplicates": 0, "invalid": 0, "errors": []}
+        seen = set()
+        batch = []
+        for position, user_data in enumerate(users):
+            errors = validate_user(user_data)
+            if errors:
+                summary["invalid"] += 1
+                summary["errors"].append((position, errors))
+                continue
+            # Stored under the schema names, so the profile loads at login
+            user_data = canonical_profile(user_data)
+            # Later copies of an email in the same import are duplicates
+            if user_data["email"] in seen:
+                summary["duplicates"] += 1
+                continue
+            seen.add(user_data["email"])
+            batch.append({k: v for k, v in user_data.items() if k != "_id"})
+            if len(batch) >= batch_size:
+                self._write_batch(batch, update_existing, summary)
+                batch = []
+        if batch:
+            self._write_batch(batch, update_existing, summary)
+        return summary
+
+    def _write_batch(self, batch: list, update_existing: bool, summary: dict):
+        try:
+            if update_existing:
+                result = self.users.bulk_write(
+                    [UpdateOne({"email": doc["email"]}, {"$set": doc}, upsert=True) for doc in batch],
+                    ordered=False,
+                )
+                summary["inserted"] += result.upserted_count
+                summary["updated"] += result.matched_count
+                return
+
+            # One lookup per batch instead of a find_one per user
+            emails = [doc["email"] for doc in batch]
+            existing = {doc["email"] for doc in self.users.find({"email": {"$in": emails}}, {"email": 1})}
+            new_docs = [doc for doc in batch if doc["email"] not in existing]
+            summary["duplicates"] += len(batch) - len(new_docs)
+            if new_docs:
+                # insert_many adds _id to the dicts, which are not reused afterwards
+                result = self.users.insert_many(new_docs, ordered=False)
+                summary["inserted"] += len(result.inserted_ids)
+        except BulkWriteError as e:
+            # With ordered=False the rest of the batch is still written; a unique
+            # email index reports users added since the lookup as duplicate keys
+            details = e.details
+            summary["inserted"] += details.get("nInserted", 0) + details.get("nUpserted", 0)
+            summary["updated"] += details.get("nMatched", 0)
+            for error in details.get("writeErrors", []):
+                if error.get("code") == DUPLICATE_KEY_ERROR:
+                    summary["duplicates"] += 1
+                else:
+                    print(f"Error importing user: {error.get('errmsg')}")
+        except Exception as e:
+            print(f"Error importing users: {e}")
+
+    @traced("mongo.export_users")
+    @timed(MONGO_LATENCY, operation="export_users")
+    def export_users(self, path: str, query: dict | None = None, include_passwords: bool = False,
+                     batch_size: int = BULK_BATCH_SIZE) -> int:
+        """Stream the matching users to a JSONL file and return how many were written"""
+        projection = {"_id": 0} if include_passwords else {"_id": 0, "password": 0}
+        count = 0
+        try:
+            cursor = self.users.find(query or {}, projection).batch_size(batch_size)
+            with open(path, "w", encoding="utf-8") as f:
+                for user_data in cursor:
+                    f.write(json.dumps(user_data, ensure_ascii=False, default=str) + "\n")
+                    count += 1
+        except Exception as e:
+            print(f"Error exporting users: {e}")
+        return count
@@ -0,0 +1,104 @@
+"""Which profile fields each report computation depends on.
+
+Every agent is split into sections:
+- "calculation": the rule-based numbers (tables, scores)
+- "narrative": the Gemini prompt and its response
+- "report": the assembled text and PDF, which also shows plain profile fields
+
+A change to a field only reruns the sections that list it, so editing e.g.
+`name_surname` rebuilds the retirement PDF without a new Gemini call.
+Field names follow `user_schema`; the agents still read a few legacy spellings,
+which are listed in FIELD_ALIASES so they are tracked too.
+"""
+
+FIELD_ALIASES = {
+    "marital_status": ("martial_status",),
+    "highest_education_level": ("education_level",),
+    "annual_working_hours": ("anual_working_hours",),
+}
+
+_RETIREMENT_CALCULATION = (
+    "age", "gender", "monthly_income", "monthly_expenses", "assets",
+    "target_retirement_age", "target_retirement_income",
+    "family_health_history", "lifestyle_habits",
+)
+
+_LONGEVITY_CALCULATION = (
+    "age", "gender", "highest_education_level", "monthly_income", "marital_status",
+    "family_health_history", "lifestyle_habits", "chronic_diseases",
+)
+
+_HEALTH_COST_CALCULATION = (
+    "age", "location", "chronic_diseases", "family_health_history",
+    "lifestyle_habits", "monthly_income",
+)
+
+REPORT_DEPENDENCIES = {
+    "retirement": {
+        "calculation": _RETIREMENT_CALCULATION,
+        "narrative": _RETIREMENT_CALCULATION + (
+            "occupation", "highest_education_level", "marital_status",
+            "number_of_children", "location", "chronic_diseases", "debt",
+        ),
+        "report": ("name_surname",),
+    },
+    "longevity": {
+        "calculation": _LONGEVITY_CALCULATION,
+        "narrative": _LONGEVITY_CALCULATION + ("location",),
+        "report": (),
+    },
+    "health_cost": {
+        "calculation": _HEALTH_COST_CALCULATION,
+        "narrative": _HEALTH_COST_CALCULATION + (
+            "name_surname", "gender", "marital_status", "highest_education_level",
+            "occupation", "monthly_expenses", "debt", "assets",
+            "target_retirement_age", "target_retirement_income",
+        ),
+        "report": ("gender",),
+    },
+}
+
+
+def canonical_profile(user_data: dict) -> dict:
+    """Copy of user_data with legacy field spellings renamed to their user_schema names"""
+    profile = dict(user_data)
+    for field, aliases in FIELD_ALIASES.items():
+        for alias in aliases:
+            if alias in profile:
+                value = profile.pop(alias)
+                if profile.get(field) is None:
+                    profile[field] = value
+    return profile
+
+
+def _expand(fields) -> set:
+    expanded = set()
+    for field in fields:
+        expanded.add(field)
+        expanded.update(FIELD_ALIASES.get(field, ()))
+    return expanded
+
+
+def fields_for(agent: str, section: str | None = None) -> set:
+    """Return the profile fields a section depends on.
+
+    The "report" section, or section=None, covers everything the agent reads.
+    """
+    sections = REPORT_DEPENDENCIES[agent]
+    if section is None or section == "report":
+        fields = set()
+        for section_fields in sections.values():
+            fields.update(section_fields)
+        return _expand(fields)
+    return _expand(sections[section])
+
+
+def affected_sections(changed_fields) -> list[tuple[str, str]]:
+    """Return the (agent, section) pairs that must be recomputed after an edit"""
+    changed = _expand(changed_fields)
+    affected = []
+    for agent, sections in REPORT_DEPENDENCIES.items():
+        for section in sections:
+            if changed & fields_for(agent, section):
+                affected.append((agent, section))
+    return affected
@@ -0,0 +1,179 @@
+import heapq
+import itertools
+import os
+import threading
+import time
+
+from google.api_core import exceptions, retry
+
+# Budgets shared by every LLM call in the process
+LLM_RPM = int(os.getenv("LLM_RPM", "60"))
+LLM_TPM = int(os.getenv("LLM_TPM", "1000000"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+LLM_RETRY_DEADLINE = float(os.getenv("LLM_RETRY_DEADLINE", "60"))
+
+# Lower value is served first when calls are waiting for a slot
+PRIORITY_CHAT = 0
+PRIORITY_REPORT = 1
+
+RETRYABLE_EXCEPTIONS = (
+    exceptions.ResourceExhausted,
+    exceptions.ServiceUnavailable,
+    exceptions.InternalServerError,
+    exceptions.DeadlineExceeded,
+)
+RETRYABLE_STATUS_CODES = (429, 500, 503, 504)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token)"""
+    return len(text or "") // 4 + 1
+
+
+def is_retryable(exc: Exception) -> bool:
+    """Provider throttling and transient server errors are retried, everything else is not"""
+    if isinstance(exc, RETRYABLE_EXCEPTIONS):
+        return True
+    # google.genai errors carry the HTTP status in .code instead of using api_core types
+    return getattr(exc, "code", None) in RETRYABLE_STATUS_CODES
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at a per-minute rate.
+
+    Waiters are served lowest priority value first, so a chat turn arriving
+    behind a queue of report calls takes the next tokens that free up.
+    """
+
+    def __init__(self, per_minute: int):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.tokens = float(per_minute)
+        self.updated = time.monotonic()
+        self._waiters = []
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, amount: int = 1, priority: int = PRIORITY_REPORT):
+        """Block until amount tokens are available to this waiter and take them"""
+        amount = min(amount, self.capacity)
+        with self._cond:
+            entry = (priority, next(self._counter))
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    self._refill()
+                    if self._waiters[0] != entry:
+                        # Only the head of the line waits on the refill
+                        self._cond.wait()
+                    elif self.tokens >= amount:
+                        self.tokens -= amount
+                        return
+                    else:
+                        self._cond.wait((amount - self.tokens) / self.rate)
+            finally:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                # The next waiter in line becomes the head
+                self._cond.notify_all()
+
+    def refund(self, amount: int):
+        """Give back tokens that were reserved but not used"""
+        if amount <= 0:
+            return
+        with self._cond:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens + amount)
+            self._cond.notify_all()
+
+
+class PrioritySemaphore:
+    """Semaphore that hands free slots to the waiter with the lowest priority value first"""
+
+    def __init__(self, value: int):
+        self._value = value
+        self._waiters = []
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+
+    def acquire(self, priority: int = PRIORITY_REPORT):
+        with self._cond:
+            entry = (priority, next(self._counter))
+            heapq.heappush(self._waiters, entry)
+            while self._value == 0 or self._waiters[0] != entry:
+                self._cond.wait()
+            heapq.heappop(self._waiters)
+            self._value -= 1
+            # Another slot may still be free for the next waiter in line
+            self._cond.notify_all()
+
+    def release(self):
+        with self._cond:
+            self._value += 1
+            self._cond.notify_all()
+
+
+class LLMGovernor:
+    """Coordinates every LLM call in the process.
+
+    Each attempt waits for request and token budget, then for a concurrency
+    slot; chat is served before reports at every step, so a chat turn does
+    not wait behind reports that are queued for budget. Throttled or transient failures are retried
+    with jittered exponential backoff from google.api_core.retry.
+    """
+
+    def __init__(self, rpm: int = LLM_RPM, tpm: int = LLM_TPM,
+                 max_concurrency: int = LLM_MAX_CONCURRENCY, retry_deadline: float = LLM_RETRY_DEADLINE):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.slots = PrioritySemaphore(max_concurrency)
+        self.retry = retry.Retry(
+            predicate=is_retryable,
+            initial=1.0,
+            maximum=30.0,
+            multiplier=2.0,
+            timeout=retry_deadline,
+            on_error=lambda exc: print(f"LLM call failed, retrying: {exc}"),
+        )
+
+    def run(self, call, priority: int = PRIORITY_REPORT, prompt: str = "", max_output_tokens: int = 1024,
+            breaker=None):
+        """Run call() under the shared limits and return its text result.
+
+        With a circuit breaker, only the provider call itself is timed
+        against the breaker's latency SLO; waiting for a slot or for rate
+        budget in this process never counts as a backend failure.
+        """
+        return self.retry(self._attempt)(call, priority, prompt, max_output_tokens, breaker)
+
+    def _attempt(self, call, priority, prompt, max_output_tokens, breaker=None):
+        if breaker is not None:
+            # Fail fast while the circuit is open instead of queueing first
+            breaker.check()
+        reserved = estimate_tokens(prompt) + max_output_tokens
+        self.requests.acquire(1, priority)
+        self.tokens.acquire(reserved, priority)
+        self.slots.acquire(priority)
+        if breaker is None:
+            try:
+                text = call()
+            finally:
+                self.slots.release()
+        else:
+            def provider_call():
+                # A call past the SLO keeps its slot until it really finishes
+                try:
+                    return call()
+                finally:
+                    self.slots.release()
+            text = breaker.run(provider_call)
+        self.tokens.refund(max_output_tokens - estimate_tokens(text))
+        return text
+
+
+governor = LLMGovernor()
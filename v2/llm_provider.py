@@ -0,0 +1,297 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from dotenv import load_dotenv
+
+from llm_governor import governor, estimate_tokens, PRIORITY_CHAT, PRIORITY_REPORT
+from circuit_breaker import get_breaker
+from tracing import span
+from metrics import LLM_LATENCY, LLM_TOKENS, LLM_ERRORS
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# "gemini" talks to Google, "stub" returns canned responses without network access
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini")
+LLM_STUB_LATENCY = float(os.getenv("LLM_STUB_LATENCY", "0"))
+
+DEFAULT_MODEL = "gemini-1.5-flash"
+CHAT_MODEL = "gemini-2.0-flash"
+# Model handles kept per (model, system instruction); report tasks use a few static instructions
+LLM_MODEL_CACHE_SIZE = int(os.getenv("LLM_MODEL_CACHE_SIZE", "32"))
+
+
+# Agent label of each task in the LLM metrics
+TASK_AGENTS = {
+    "retirement_insights": "retirement",
+    "longevity_analysis": "longevity",
+    "health_recommendations": "health_cost",
+}
+
+
+class LLMProvider:
+    """Interface every LLM backend implements.
+
+    Agents only call generate() and create_chat(), so the backend can be
+    swapped without touching report code. Backends implement _generate()
+    and _create_chat(); every call goes through the shared LLMGovernor.
+    """
+
+    name = "base"
+
+    def generate(self, prompt: str, task: str = "default", model: str = DEFAULT_MODEL,
+                 system_instruction: str | None = None, **generation_config) -> str:
+        """Return the text response for a single prompt.
+
+        Args:
+            prompt: per-call prompt text
+            task: what the response is used for, e.g. "retirement_insights"
+            model: model name
+            system_instruction: static instructions shared by every call of a task
+            generation_config: temperature, top_p, top_k, max_output_tokens
+        """
+        max_output_tokens = generation_config.get("max_output_tokens", 1024)
+        budget_text = (system_instruction or "") + prompt
+        agent = TASK_AGENTS.get(task, task)
+        start = time.perf_counter()
+        with span("llm.generate", backend=self.name, model=model, task=task):
+            call = lambda: self._generate(prompt, task, model, system_instruction, **generation_config)
+            try:
+                if task == "chat":
+                    text = governor.run(call, priority=PRIORITY_CHAT, prompt=budget_text,
+                                        max_output_tokens=max_output_tokens)
+                else:
+                    # Report calls are bounded by the backend's circuit breaker and raise
+                    # LLMUnavailable instead of blocking when the backend is slow or down
+                    text = governor.run(call, priority=PRIORITY_REPORT, prompt=budget_text,
+                                        max_output_tokens=max_output_tokens, breaker=get_breaker(self.name))
+            except Exception as e:
+                LLM_ERRORS.inc(agent=agent, model=model, error=type(e).__name__)
+                raise
+            finally:
+                LLM_LATENCY.observe(time.perf_counter() - start, agent=agent, model=model)
+        LLM_TOKENS.inc(estimate_tokens(budget_text), agent=agent, model=model, direction="prompt")
+        LLM_TOKENS.inc(estimate_tokens(text), agent=agent, model=model, direction="output")
+        return text
+
+    def count_tokens(self, text: str, model: str = DEFAULT_MODEL) -> int:
+        """Return the number of input tokens text would use"""
+        return estimate_tokens(text)
+
+    def create_chat(self, system_instruction: str, tools=None, model: str = CHAT_MODEL):
+        """Return a chat session object with a send_message(message) -> str method"""
+        return self._create_chat(system_instruction, tools, model)
+
+    def _generate(self, prompt, task, model, system_instruction, **generation_config) -> str:
+        raise NotImplementedError
+
+    def _create_chat(self, system_instruction, tools, model):
+        raise NotImplementedError
+
+
+class GeminiChat:
+    def __init__(self, chat):
+        self._chat = chat
+
+    def send_message(self, message: str) -> str:
+        # Chat turns are interactive, so they jump ahead of queued report calls
+        with span("llm.chat", backend="gemini"):
+            return governor.run(
+                lambda: self._chat.send_message(message).text,
+                priority=PRIORITY_CHAT,
+                prompt=message,
+            )
+
+
+class GeminiProvider(LLMProvider):
+    """Google Gemini backend.
+
+    The SDKs are configured once per provider, and the provider is shared by
+    the whole process (get_provider), so model handles and the chat client
+    with its pooled keep-alive connections are reused across reports and
+    sessions instead of being rebuilt per call.
+    """
+
+    name = "gemini"
+
+    def __init__(self, api_key: str | None = None, model_cache_size: int = LLM_MODEL_CACHE_SIZE):
+        import google.generativeai as genai
+        from google.generativeai import types
+
+        self.api_key = api_key or os.getenv("GENAI_KEY")
+        self._genai = genai
+        self._types = types
+        genai.configure(api_key=self.api_key)
+        self.model_cache_size = model_cache_size
+        self._models = OrderedDict()
+        self._chat_client = None
+        self._lock = threading.Lock()
+
+    def model(self, model: str, system_instruction: str | None = None):
+        """Shared GenerativeModel handle for a model and system instruction"""
+        key = (model, system_instruction)
+        with self._lock:
+            handle = self._models.get(key)
+            if handle is None:
+                handle = self._models[key] = self._genai.GenerativeModel(model, system_instruction=system_instruction)
+                while len(self._models) > self.model_cache_size:
+                    self._models.popitem(last=False)
+            else:
+                self._models.move_to_end(key)
+            return handle
+
+    def chat_client(self):
+        """Shared google.genai client; its HTTP connection pool is reused by every chat"""
+        with self._lock:
+            if self._chat_client is None:
+                from google import genai as google_genai
+                self._chat_client = google_genai.Client(api_key=self.api_key)
+            return self._chat_client
+
+    def count_tokens(self, text: str, model: str = DEFAULT_MODEL) -> int:
+        """Input tokens counted by the model's tokenizer, or the estimate if counting fails"""
+        try:
+            return self.model(model).count_tokens(text).total_tokens
+        except Exception as e:
+            logger.warning("Counting tokens with %s failed, using the estimate: %s", model, e)
+            return estimate_tokens(text)
+
+    def _generate(self, prompt, task, model, system_instruction, **generation_config):
+        response = self.model(model, system_instruction).generate_content(
+            contents=prompt,
+            generation_config=self._types.GenerationConfig(**generation_config)
+        )
+        return response.text
+
+    def _create_chat(self, system_instruction, tools, model):
+        from google.genai import types
+
+        chat = self.chat_client().chats.create(
+            model=model,
+            config=types.GenerateContentConfig(system_instruction=system_instruction, tools=tools),
+        )
+        return GeminiChat(chat)
+
+
+def _stub_json(key, items):
+    return json.dumps({key: items})
+
+
+# JSON tasks answer in the shape of report_schema.RESPONSE_SCHEMAS
+STUB_RESPONSES = {
+    "retirement_insights": _stub_json("sections", [
+        {"title": "1. CURRENT POSITION ANALYSIS", "subsections": [
+            {"title": "Financial Position", "content": "Income currently covers expenses with a positive monthly surplus."},
+            {"title": "Savings Rate & Timeline", "content": "The savings rate supports the target timeline if maintained."},
+        ]},
+        {"title": "2. PERSONALIZED RECOMMENDATIONS", "subsections": [
+            {"title": "Strategic Actions", "content": "Automate monthly contributions to a diversified retirement account."},
+            {"title": "Investment Framework", "content": "Hold a balanced mix of equity and bond index funds."},
+        ]},
+        {"title": "3. RISK FACTORS & MITIGATION", "subsections": [
+            {"title": "Primary Risk Assessment", "content": "Income stability is the main risk to the plan."},
+            {"title": "Protection Strategies", "content": "Keep an emergency fund of six months of expenses."},
+        ]},
+        {"title": "4. LIFESTYLE CONSIDERATIONS", "subsections": [
+            {"title": "Work-Life Integration", "content": "Current working hours leave room for career development."},
+            {"title": "Family Planning", "content": "Review beneficiaries and basic estate documents."},
+        ]},
+        {"title": "5. OPTIMIZATION OPPORTUNITIES", "subsections": [
+            {"title": "Immediate Enhancements", "content": "Raise contributions with every income increase."},
+            {"title": "Long-term Optimization", "content": "Rebalance the portfolio once a year."},
+        ]},
+    ]),
+
+    "longevity_analysis": _stub_json("sections", [
+        {"title": "CURRENT HEALTH ASSESSMENT",
+         "key_point": "No major chronic conditions are reported.",
+         "finding": "Expected lifespan follows the calculated baseline.",
+         "impact": "Current health status supports the baseline estimate."},
+        {"title": "LONGEVITY FACTORS ANALYSIS",
+         "key_point": "Gender and income set the baseline (CDC, 2021).",
+         "finding": "Lifestyle habits add to the baseline.",
+         "impact": "Socioeconomic factors have a moderate effect."},
+        {"title": "RISK STRATIFICATION",
+         "key_point": "Overall risk is driven by family history and lifestyle.",
+         "finding": "No high severity risk factors are present.",
+         "impact": "The cumulative risk remains moderate."},
+        {"title": "PROTECTIVE FACTORS",
+         "key_point": "Regular exercise is a protective behavior (WHO).",
+         "finding": "Not smoking adds years to life expectancy (CDC).",
+         "impact": "Protective factors offset part of the risk."},
+        {"title": "DETAILED RECOMMENDATIONS",
+         "key_point": "Keep at least 150 minutes of activity per week (WHO).",
+         "finding": "Annual check-ups catch conditions early.",
+         "impact": "Preventive care improves long-term outcomes."},
+    ]),
+
+    "health_recommendations": _stub_json("recommendations", [
+        {"text": f"Stub recommendation {i} based on your reported profile.", "source": "WHO"} for i in range(1, 16)
+    ]),
+
+    "chat": "Thank you for your information. Could you tell me a bit more about yourself?",
+
+    "default": "Stub response.",
+}
+
+
+class StubChat:
+    def __init__(self, provider):
+        self._provider = provider
+
+    def send_message(self, message: str) -> str:
+        return self._provider.generate(message, task="chat")
+
+
+class StubProvider(LLMProvider):
+    """Deterministic offline backend for load tests and benchmarks.
+
+    Returns canned responses shaped like what each task expects, after a
+    configurable delay that stands in for network and generation time.
+    """
+
+    name = "stub"
+
+    def __init__(self, latency: float = LLM_STUB_LATENCY, responses: dict | None = None):
+        self.latency = latency
+        self.responses = {**STUB_RESPONSES, **(responses or {})}
+
+    def _generate(self, prompt, task, model, system_instruction, **generation_config):
+        if self.latency:
+            time.sleep(self.latency)
+        return self.responses.get(task, self.responses["default"])
+
+    def _create_chat(self, system_instruction, tools, model):
+        return StubChat(self)
+
+
+PROVIDERS = {
+    "gemini": GeminiProvider,
+    "stub": StubProvider,
+}
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def get_provider() -> LLMProvider:
+    """Return the process-wide provider, creating it from LLM_BACKEND on first use"""
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                if LLM_BACKEND not in PROVIDERS:
+                    raise ValueError(f"Unknown LLM backend: {LLM_BACKEND}")
+                _provider = PROVIDERS[LLM_BACKEND]()
+    return _provider
+
+
+def set_provider(provider: LLMProvider):
+    """Replace the process-wide provider, e.g. with a StubProvider in benchmarks"""
+    global _provider
+    _provider = provider
@@ -0,0 +1,280 @@
+"""Load test with many concurrent virtual users.
+
+    python load_test.py --users 20 --duration 60 --mongomock --llm-latency 0.5
+    python load_test.py --users 50 --url http://127.0.0.1:7860
+
+Every virtual user signs up with a profile from a synthetic pool (variations
+of example-user.json), then repeatedly logs in, sends a chat message and
+opens the three reports. Latency percentiles, throughput and error rates
+are reported per endpoint.
+
+Without --url the handlers in app.py are called in this process, with the
+stub LLM backend and either the local Mongo or mongomock. With --url a
+running app is driven over HTTP through gradio_client; start it with
+LLM_BACKEND=stub so no quota is used. Users are seeded into the Mongo
+configured by MONGODB_URI/DB_NAME in both modes.
+
+A retirement report that names a different user than the one logged in is
+counted as "wrong_user": with a single global session this happens as soon
+as virtual users overlap. A failed login aborts the whole run, since every
+later call would measure the logged-out error path.
+"""
+import argparse
+import copy
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+
+ENDPOINTS = ("signup", "login", "chat", "retirement_report", "longevity_report", "health_cost_report")
+REPORT_HANDLERS = {
+    "retirement_report": "get_retirement_report",
+    "longevity_report": "get_longevity_report",
+    "health_cost_report": "get_health_cost_report",
+}
+CHAT_MESSAGES = ["Hi, can you check my profile?", "I exercise three times a week.", "What is missing?"]
+PASSWORD = "loadtest"
+FIRST_NAMES = ["emre", "ayse", "john", "maria", "li", "fatma", "david", "sara"]
+LAST_NAMES = ["demir", "yilmaz", "smith", "garcia", "chen", "kaya", "brown", "ozturk"]
+
+
+def user_pool(size: int, seed: int = 472) -> list:
+    """Variations of example-user.json with unique emails, using user_schema field names"""
+    from dependencies import canonical_profile
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "example-user.json")) as f:
+        # example-user.json keeps legacy spellings that User(**profile) rejects at login
+        example = canonical_profile(json.load(f))
+    rng = random.Random(seed)
+    pool = []
+    for i in range(size):
+        profile = copy.deepcopy(example)
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i}"
+        income = rng.randrange(1500, 12000, 100)
+        profile.update({
+            "name_surname": name,
+            "email": f"loadtest{i}@example.com",
+            "age": rng.randint(22, 60),
+            "gender": rng.choice(["Male", "Female"]),
+            "marital_status": rng.choice(["Single", "Married", "Divorced"]),
+            "number_of_children": rng.randint(0, 3),
+            "monthly_income": income,
+            "monthly_expenses": int(income * rng.uniform(0.5, 0.95)),
+            "debt": rng.choice([0, 5000, 25000]),
+            "assets": f"savings of ${rng.randrange(0, 300000, 1000):,}",
+            "location": rng.choice(["USA", "Europe", "Turkey", "Asia"]),
+            "chronic_diseases": rng.choice(["none", "diabetes", "hypertension, asthma"]),
+            "target_retirement_age": rng.randint(60, 70),
+            "target_retirement_income": rng.randrange(2000, 8000, 500),
+        })
+        pool.append(profile)
+    return pool
+
+
+def percentile(ordered: list, p: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered))) - 1))]
+
+
+class Results:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.wrong_user = 0
+        self.abort_reason = None
+        self._abort = threading.Event()
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, seconds: float, ok: bool):
+        with self._lock:
+            self.latencies[endpoint].append(seconds)
+            if not ok:
+                self.errors[endpoint] += 1
+
+    def record_wrong_user(self):
+        with self._lock:
+            self.wrong_user += 1
+
+    def abort(self, reason: str):
+        """Stop every virtual user; numbers measured without a session are meaningless"""
+        with self._lock:
+            if self.abort_reason is None:
+                self.abort_reason = reason
+        self._abort.set()
+
+    @property
+    def aborted(self) -> bool:
+        return self._abort.is_set()
+
+    def summary(self, elapsed: float) -> dict:
+        endpoints = {}
+        for endpoint in ENDPOINTS:
+            samples = sorted(self.latencies.get(endpoint, []))
+            if not samples:
+                continue
+            endpoints[endpoint] = {
+                "requests": len(samples),
+                "errors": self.errors[endpoint],
+                "error_rate": round(self.errors[endpoint] / len(samples), 4),
+                "throughput_rps": round(len(samples) / elapsed, 3),
+                "p50_ms": round(percentile(samples, 50) * 1000, 1),
+                "p95_ms": round(percentile(samples, 95) * 1000, 1),
+                "p99_ms": round(percentile(samples, 99) * 1000, 1),
+            }
+        return {"elapsed_seconds": round(elapsed, 3), "wrong_user": self.wrong_user,
+                "aborted": self.abort_reason, "endpoints": endpoints}
+
+
+class InProcessDriver:
+    """Calls the app handlers directly, as Gradio's worker threads would"""
+
+    def __init__(self):
+        import app
+        import chat_interface
+        self._app = app
+        self._chat = chat_interface
+
+    def call(self, endpoint: str, *args):
+        if endpoint == "chat":
+            return self._chat.send_message(args[0], [])
+        name = REPORT_HANDLERS.get(endpoint, endpoint)
+        return getattr(self._app, name)(*args)
+
+
+class HttpDriver:
+    """Calls the event endpoints of a running app; one client (session) per virtual user"""
+
+    def __init__(self, url: str):
+        from gradio_client import Client
+        self._url = url
+        self._client_class = Client
+        self._local = threading.local()
+
+    def call(self, endpoint: str, *args):
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self._client_class(self._url, verbose=False)
+        name = REPORT_HANDLERS.get(endpoint, endpoint)
+        return client.predict(*args, api_name=f"/{name}")
+
+
+def is_error(endpoint: str, result) -> bool:
+    text = result[0] if isinstance(result, (tuple, list)) and result else result
+    text = str(text or "")
+    if endpoint == "signup":
+        return not text.startswith("Signup successful")
+    if endpoint == "login":
+        return text != "Login successful!"
+    return text.startswith("Error")
+
+
+def timed_call(driver, results: Results, endpoint: str, *args):
+    start = time.perf_counter()
+    try:
+        result = driver.call(endpoint, *args)
+        ok = not is_error(endpoint, result)
+    except Exception as e:
+        result, ok = None, False
+        print(f"{endpoint} failed: {str(e)}")
+    results.record(endpoint, time.perf_counter() - start, ok)
+    return result
+
+
+def check_user(results: Results, profile: dict, result):
+    """Count retirement reports built for somebody else's profile"""
+    text = str(result[0] if isinstance(result, (tuple, list)) else result)
+    if not text.startswith("Error") and profile["name_surname"] not in text:
+        results.record_wrong_user()
+
+
+def virtual_user(driver, results: Results, db, profile: dict, deadline: float, iterations: int):
+    """Sign up, then log in, chat and open every report until the deadline"""
+    email = profile["email"]
+    timed_call(driver, results, "signup", profile["name_surname"], email, PASSWORD)
+    # Signup only stores name, email and password; fill in the rest like the chat would
+    db.update_user(email, {k: v for k, v in profile.items() if k != "email"})
+
+    rng = random.Random(email)
+    done = 0
+    while time.monotonic() < deadline and (not iterations or done < iterations) and not results.aborted:
+        result = timed_call(driver, results, "login", email, PASSWORD)
+        if result is None or is_error("login", result):
+            text = result[0] if isinstance(result, (tuple, list)) and result else result
+            results.abort(f"login failed for {email}: {text}")
+            return
+        timed_call(driver, results, "chat", rng.choice(CHAT_MESSAGES))
+        for endpoint in REPORT_HANDLERS:
+            result = timed_call(driver, results, endpoint)
+            if endpoint == "retirement_report" and result:
+                check_user(results, profile, result)
+        done += 1
+
+
+def run(args) -> dict:
+    pool = user_pool(args.users, args.seed)
+    driver = HttpDriver(args.url) if args.url else InProcessDriver()
+    from db_connector import MongoDBConnector
+    db = MongoDBConnector()
+    # Leftovers of an earlier run would make signup fail
+    db.users.delete_many({"email": {"$in": [p["email"] for p in pool]}})
+
+    results = Results()
+    deadline = time.monotonic() + args.duration
+    start = time.perf_counter()
+    threads = [
+        threading.Thread(target=virtual_user, args=(driver, results, db, profile, deadline, args.iterations),
+                         name=f"virtual-user-{i}")
+        for i, profile in enumerate(pool)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results.summary(time.perf_counter() - start)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Simulate concurrent users against the app")
+    parser.add_argument("--users", type=int, default=10, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=60, help="seconds to keep users looping")
+    parser.add_argument("--iterations", type=int, default=0, help="loops per user (0: until --duration)")
+    parser.add_argument("--url", help="drive a running app over HTTP instead of calling it in-process")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="stub LLM delay in seconds (in-process)")
+    parser.add_argument("--mongomock", action="store_true", help="use an in-memory mongomock database (in-process)")
+    parser.add_argument("--seed", type=int, default=472)
+    parser.add_argument("--output", help="write the summary as JSON")
+    args = parser.parse_args(argv)
+
+    if not args.url:
+        # Read at import by llm_provider and llm_governor
+        os.environ["LLM_BACKEND"] = "stub"
+        os.environ["LLM_STUB_LATENCY"] = str(args.llm_latency)
+        os.environ.setdefault("LLM_RPM", "1000000")
+        os.environ.setdefault("METRICS_PORT", "0")
+        if args.mongomock:
+            import mongomock
+            import pymongo
+            pymongo.MongoClient = mongomock.MongoClient
+    elif args.mongomock:
+        parser.error("--mongomock only works in-process; the app behind --url has its own database")
+
+    summary = run(args)
+    if summary.get("aborted"):
+        print(f"Load test aborted, {summary['aborted']}")
+        return 1
+    print(f"{'endpoint':20} {'requests':>9} {'errors':>7} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for endpoint, stats in summary["endpoints"].items():
+        print(f"{endpoint:20} {stats['requests']:9} {stats['errors']:7} {stats['throughput_rps']:8.2f} "
+              f"{stats['p50_ms']:9.1f} {stats['p95_ms']:9.1f} {stats['p99_ms']:9.1f}")
+    print(f"Reports naming a different user: {summary['wrong_user']}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(summary, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
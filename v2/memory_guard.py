@@ -0,0 +1,164 @@
+"""Memory instrumentation and an RSS watchdog for long-running workers.
+
+    take_snapshot("before_bundle")
+    print(top_allocators(limit=20))
+
+With MEMORY_TRACEMALLOC=1 allocations are traced from startup. With
+MEMORY_DEBUG_ENDPOINT=1, /debug/memory on the metrics port lists the source
+lines that allocated the most memory since the baseline snapshot taken at
+start(); it shows source paths, so it is off by default. Tracing costs CPU
+and memory of its own, so keep it off unless a process is being diagnosed.
+
+The watchdog checks the resident set size every MEMORY_CHECK_INTERVAL
+seconds. Above MEMORY_RSS_SOFT_MB it runs the release hooks (caches
+register one) and a full garbage collection. Above MEMORY_RSS_LIMIT_MB the
+process recycles itself with SIGTERM, so it must run under a supervisor
+that restarts it (systemd, docker --restart, a process manager).
+"""
+import gc
+import os
+import signal
+import threading
+import time
+import tracemalloc
+
+from metrics import PROCESS_RSS, register_route
+
+MEMORY_TRACEMALLOC = os.getenv("MEMORY_TRACEMALLOC", "") == "1"
+# Frames kept per traced allocation; more frames show more of the call path
+MEMORY_TRACE_FRAMES = int(os.getenv("MEMORY_TRACE_FRAMES", "10"))
+MEMORY_DEBUG_ENDPOINT = os.getenv("MEMORY_DEBUG_ENDPOINT", "") == "1"
+# Megabytes of RSS that trigger the release hooks; 0 disables the check
+MEMORY_RSS_SOFT_MB = int(os.getenv("MEMORY_RSS_SOFT_MB", "0"))
+# Megabytes of RSS at which the process recycles itself; 0 disables recycling
+MEMORY_RSS_LIMIT_MB = int(os.getenv("MEMORY_RSS_LIMIT_MB", "0"))
+MEMORY_CHECK_INTERVAL = float(os.getenv("MEMORY_CHECK_INTERVAL", "30"))
+
+_release_hooks = []
+_snapshots = {}
+_lock = threading.Lock()
+_watchdog = None
+
+
+def current_rss() -> int:
+    """Resident set size of this process in bytes"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # No procfs (macOS): the peak RSS is the best available figure
+        import resource
+        import sys
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def register_release_hook(fn):
+    """Call fn() to drop cached data when RSS crosses the soft limit"""
+    _release_hooks.append(fn)
+    return fn
+
+
+def release_memory() -> int:
+    """Run the release hooks and a full collection; returns the bytes freed"""
+    before = current_rss()
+    for hook in list(_release_hooks):
+        try:
+            hook()
+        except Exception as e:
+            print(f"Error in memory release hook {getattr(hook, '__qualname__', hook)}: {str(e)}")
+    gc.collect()
+    return before - current_rss()
+
+
+def take_snapshot(name: str = "baseline"):
+    """Store a tracemalloc snapshot under name; a no-op unless tracing is on"""
+    if not tracemalloc.is_tracing():
+        return None
+    snapshot = tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ))
+    with _lock:
+        _snapshots[name] = snapshot
+    return snapshot
+
+
+def top_allocators(limit: int = 25, since: str = "baseline", key_type: str = "lineno") -> str:
+    """Text table of the allocation sites that grew most since the snapshot named since"""
+    if not tracemalloc.is_tracing():
+        return "tracemalloc is off; start the process with MEMORY_TRACEMALLOC=1\n"
+    current = take_snapshot("latest")
+    with _lock:
+        previous = _snapshots.get(since)
+    current_size, peak = tracemalloc.get_traced_memory()
+    lines = [
+        f"rss_bytes {current_rss()}",
+        f"traced_bytes {current_size}",
+        f"traced_peak_bytes {peak}",
+        "",
+    ]
+    if previous is None:
+        lines.append(f"Top {limit} allocation sites:")
+        stats = current.statistics(key_type)
+        lines.extend(str(stat) for stat in stats[:limit])
+    else:
+        lines.append(f"Top {limit} allocation sites by growth since '{since}':")
+        stats = current.compare_to(previous, key_type)
+        lines.extend(str(stat) for stat in stats[:limit])
+    return "\n".join(lines) + "\n"
+
+
+class RSSWatchdog:
+    """Releases caches above soft_bytes and recycles the process above limit_bytes"""
+
+    def __init__(self, soft_bytes: int, limit_bytes: int, interval: float = MEMORY_CHECK_INTERVAL):
+        self.soft_bytes = soft_bytes
+        self.limit_bytes = limit_bytes
+        self.interval = interval
+        # RSS after the last release; Python rarely hands freed memory back to
+        # the OS, so release again only once the process has grown past it
+        self._released_at = 0
+        self._thread = threading.Thread(target=self._run, name="rss-watchdog", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def check(self) -> int:
+        rss = current_rss()
+        PROCESS_RSS.set(rss)
+        if self.soft_bytes and rss > max(self.soft_bytes, self._released_at * 1.1):
+            freed = release_memory()
+            rss = self._released_at = current_rss()
+            print(f"RSS above soft limit, released caches ({freed / 2**20:.1f} MB freed, now {rss / 2**20:.1f} MB)")
+        if self.limit_bytes and rss > self.limit_bytes:
+            print(f"RSS {rss / 2**20:.1f} MB above MEMORY_RSS_LIMIT_MB, recycling process {os.getpid()}")
+            os.kill(os.getpid(), signal.SIGTERM)
+        return rss
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.check()
+            except Exception as e:
+                print(f"Error checking memory: {str(e)}")
+
+
+def start():
+    """Start tracing and the watchdog as configured, once per process"""
+    global _watchdog
+    with _lock:
+        if _watchdog is not None:
+            return _watchdog
+        if MEMORY_TRACEMALLOC and not tracemalloc.is_tracing():
+            tracemalloc.start(MEMORY_TRACE_FRAMES)
+        _watchdog = RSSWatchdog(MEMORY_RSS_SOFT_MB * 2**20, MEMORY_RSS_LIMIT_MB * 2**20)
+        _watchdog.start()
+    # Growth is measured from here, after imports and startup caches
+    take_snapshot("baseline")
+    return _watchdog
+
+
+if MEMORY_DEBUG_ENDPOINT:
+    register_route("/debug/memory", top_allocators)
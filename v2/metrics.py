@@ -0,0 +1,239 @@
+"""Prometheus metrics for the app, served as text on METRICS_PORT.
+
+Recording a value is a dict lookup and an addition under a per-metric lock,
+so it is cheap enough for every request. Rendering only happens when
+/metrics is scraped.
+"""
+import bisect
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Port of the /metrics endpoint; 0 disables it
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9464"))
+# The endpoint has no authentication; set 0.0.0.0 only where the port is not exposed publicly
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+BYTES_BUCKETS = (10_000, 50_000, 100_000, 250_000, 500_000, 1_000_000, 5_000_000)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels=()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        registry.append(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(labels.get(name, "") for name in self.label_names)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_value(key, value))
+        return lines
+
+    def _render_value(self, key, value) -> list:
+        return [f"{self.name}{_format_labels(self.label_names, key)} {value}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    @contextmanager
+    def track(self, **labels):
+        """Count the block as in progress while it runs"""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket counts (last one is +Inf), sum, count
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _render_value(self, key, value) -> list:
+        counts, total, count = value
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            le = "+Inf" if bound == float("inf") else repr(float(bound))
+            labels = _format_labels(self.label_names, key, 'le="' + le + '"')
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.label_names, key)
+        lines.append(f"{self.name}_sum{labels} {total}")
+        lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+registry = []
+
+HANDLER_LATENCY = Histogram(
+    "app_handler_duration_seconds", "Latency of UI handlers", ["handler"])
+REPORTS_IN_FLIGHT = Gauge(
+    "app_reports_in_flight", "Reports being built right now", ["agent"])
+LLM_LATENCY = Histogram(
+    "llm_request_duration_seconds", "LLM call latency, including rate limiting and retries", ["agent", "model"])
+LLM_TOKENS = Counter(
+    "llm_tokens_total", "Estimated LLM tokens", ["agent", "model", "direction"])
+LLM_ERRORS = Counter(
+    "llm_errors_total", "Failed LLM calls", ["agent", "model", "error"])
+MONGO_LATENCY = Histogram(
+    "mongo_operation_duration_seconds", "MongoDBConnector call latency", ["operation"])
+PDF_BUILD = Histogram(
+    "pdf_build_duration_seconds", "PDF build time", ["report"])
+PDF_BYTES = Histogram(
+    "pdf_size_bytes", "Size of built PDFs", ["report"], buckets=BYTES_BUCKETS)
+CACHE_REQUESTS = Counter(
+    "cache_requests_total", "Cache lookups by result", ["cache", "result"])
+PROCESS_RSS = Gauge(
+    "process_resident_memory_bytes", "Resident memory of the process, updated by the memory watchdog")
+
+# Extra plain-text pages served next to /metrics, e.g. /debug/memory
+_routes = {}
+
+
+def register_route(path: str, render_page):
+    """Serve render_page() as text at path on the metrics port"""
+    _routes[path] = render_page
+
+
+def timed(histogram: Histogram, **labels):
+    """Decorator that observes the call duration in histogram"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with histogram.time(**labels):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def pdf_metrics(report: str):
+    """Decorator for PDF builders that return the written path"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            path = fn(*args, **kwargs)
+            PDF_BUILD.observe(time.perf_counter() - start, report=report)
+            if isinstance(path, str) and os.path.exists(path):
+                PDF_BYTES.observe(os.path.getsize(path), report=report)
+            return path
+        return wrapper
+    return decorator
+
+
+def render() -> str:
+    lines = []
+    for metric in registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        if path == "/metrics":
+            page = render
+        elif path in _routes:
+            page = _routes[path]
+        else:
+            self.send_error(404)
+            return
+        body = page().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes would flood the console otherwise
+        pass
+
+
+_server = None
+
+
+def start_metrics_server(port: int = METRICS_PORT, host: str = METRICS_HOST):
+    """Serve /metrics from a daemon thread, once per process"""
+    global _server
+    if _server is not None or not port:
+        return _server
+    try:
+        _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    except OSError as e:
+        print(f"Error starting metrics server on port {port}: {e}")
+        return None
+    threading.Thread(target=_server.serve_forever, name="metrics", daemon=True).start()
+    return _server
@@ -0,0 +1,113 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from user import user_schema
+from report_cache import profile_version
+from dependencies import fields_for
+
+# Start building all reports in the background right after login
+REPORT_PREFETCH = os.getenv("REPORT_PREFETCH", "1") == "1"
+# Seconds after login in which a prefetch may still start; later jobs are dropped
+REPORT_PREFETCH_BUDGET = float(os.getenv("REPORT_PREFETCH_BUDGET", "120"))
+# Reports built at the same time by the prefetcher, across all sessions
+REPORT_PREFETCH_WORKERS = int(os.getenv("REPORT_PREFETCH_WORKERS", "3"))
+
+REQUIRED_FIELDS = [name for name, spec in user_schema.items() if spec.get("required")]
+
+
+def is_complete(user_data: dict) -> bool:
+    """True if every required profile field is filled"""
+    return all(user_data.get(field) not in (None, "") for field in REQUIRED_FIELDS)
+
+
+def is_failed(report: str) -> bool:
+    """True if handle_query returned an error message instead of a report"""
+    return not report or report.startswith(("Error", "An error occurred"))
+
+
+class ReportPrefetcher:
+    """Builds a session's reports speculatively so the first click returns at once.
+
+    Jobs are kept per session together with the profile version they were
+    started from. A click takes its job: a finished or running job is used
+    (waiting is cheaper than building twice), a job that has not started
+    yet is cancelled and the caller builds the report itself.
+
+    A session is dropped when its last job is taken or, for sessions that
+    never click or log out, once its budget has passed; a report that
+    finished by then is already in the report cache.
+    """
+
+    def __init__(self, build, max_workers: int = REPORT_PREFETCH_WORKERS,
+                 budget: float = REPORT_PREFETCH_BUDGET):
+        self._build = build
+        self.budget = budget
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+        # session_id -> (deadline, {agent name: (profile version, future)})
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def start(self, session_id: str, user_data: dict, agents) -> bool:
+        """Queue every agent's report for the session; returns False if skipped"""
+        if not REPORT_PREFETCH or not session_id or not is_complete(user_data):
+            return False
+
+        self.discard(session_id)
+        deadline = time.monotonic() + self.budget
+        jobs = {}
+        for name in agents:
+            version = profile_version(user_data, fields_for(name))
+            future = self._executor.submit(self._run, name, dict(user_data), deadline)
+            jobs[name] = (version, future)
+        with self._lock:
+            self._expire()
+            self._sessions[session_id] = (deadline, jobs)
+        return True
+
+    def _expire(self):
+        """Drop sessions past their deadline; called with the lock held"""
+        now = time.monotonic()
+        for session_id in [s for s, (deadline, _) in self._sessions.items() if deadline < now]:
+            _, jobs = self._sessions.pop(session_id)
+            for _, future in jobs.values():
+                future.cancel()
+
+    def _run(self, name, user_data, deadline):
+        # Workers were busy for the whole budget; the click will build it instead
+        if time.monotonic() > deadline:
+            return None
+        return self._build(name, user_data)
+
+    def take(self, session_id: str, name: str, user_data: dict):
+        """Return the prefetched (report, pdf_path) for the current profile, or None"""
+        with self._lock:
+            self._expire()
+            _, jobs = self._sessions.get(session_id, (None, {}))
+            job = jobs.pop(name, None)
+            if job is not None and not jobs:
+                del self._sessions[session_id]
+        if job is None:
+            return None
+
+        version, future = job
+        if version != profile_version(user_data, fields_for(name)) or future.cancel():
+            future.cancel()
+            return None
+        try:
+            result = future.result()
+        except Exception as e:
+            print(f"Error in prefetched {name} report: {str(e)}")
+            return None
+        # The agents report failures as text; let the click try again instead
+        if result is None or is_failed(result[0]):
+            return None
+        return result
+
+    def discard(self, session_id: str):
+        """Drop a session's jobs, e.g. on logout"""
+        with self._lock:
+            _, jobs = self._sessions.pop(session_id, (None, {}))
+        for _, future in jobs.values():
+            future.cancel()
@@ -0,0 +1,161 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+from db_connector import MongoDBConnector
+from metrics import CACHE_REQUESTS
+
+# Seconds a cached profile is served before it is read from Mongo again
+PROFILE_CACHE_TTL = float(os.getenv("PROFILE_CACHE_TTL", "300"))
+# Profiles kept in memory; the least recently used one is dropped first
+PROFILE_CACHE_SIZE = int(os.getenv("PROFILE_CACHE_SIZE", "1000"))
+# Seconds between polls when change streams are not available (standalone Mongo)
+PROFILE_POLL_INTERVAL = float(os.getenv("PROFILE_POLL_INTERVAL", "5"))
+
+
+def load_profile(email: str) -> dict | None:
+    user_data = MongoDBConnector().get_user(email)
+    if user_data:
+        user_data.pop("_id", None)
+    return user_data
+
+
+class ProfileCache:
+    """Read-through cache of user profiles keyed by email.
+
+    get() serves a profile from memory until it expires or is invalidated,
+    then reads it again with the loader. Missing users are not cached, and
+    neither is a profile read while an invalidation happened, since the read
+    may predate the write that caused it.
+    """
+
+    def __init__(self, load=load_profile, ttl: float = PROFILE_CACHE_TTL,
+                 max_entries: int = PROFILE_CACHE_SIZE):
+        self._load = load
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        # Bumped by every invalidate()/clear(); a load that saw an older value is not stored
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, email: str) -> dict | None:
+        """Return a copy of the user's profile, or None if the user does not exist"""
+        if not email:
+            return None
+        with self._lock:
+            entry = self._entries.get(email)
+            if entry and entry[0] > time.monotonic():
+                self._entries.move_to_end(email)
+                CACHE_REQUESTS.inc(cache="profile", result="hit")
+                return dict(entry[1])
+            generation = self._generation
+
+        CACHE_REQUESTS.inc(cache="profile", result="miss")
+        profile = self._load(email)
+        if profile is None:
+            self.invalidate(email)
+            return None
+        self.put(email, profile, generation)
+        return dict(profile)
+
+    def put(self, email: str, profile: dict, generation: int | None = None):
+        """Store a profile; with generation, only if nothing was invalidated since it was read"""
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._entries[email] = (time.monotonic() + self.ttl, dict(profile))
+            self._entries.move_to_end(email)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, email: str):
+        with self._lock:
+            self._generation += 1
+            self._entries.pop(email, None)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def cached(self) -> dict:
+        """Snapshot of the cached profiles, for the polling watcher"""
+        with self._lock:
+            return {email: profile for email, (_, profile) in self._entries.items()}
+
+
+class ProfileWatcher:
+    """Invalidates cached profiles when users change in Mongo, from any process.
+
+    Follows the user collection's change stream. Change streams need a
+    replica set; on a standalone server the watcher polls the cached users
+    every poll_interval seconds instead and drops the ones that changed.
+    """
+
+    def __init__(self, cache: ProfileCache, poll_interval: float = PROFILE_POLL_INTERVAL):
+        self.cache = cache
+        self.poll_interval = poll_interval
+        self.mode = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the watcher thread once per process"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="profile-watcher", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        users = MongoDBConnector().users
+        while True:
+            try:
+                self.mode = "change_stream"
+                self._watch(users)
+            except (OperationFailure, NotImplementedError) as e:
+                # Standalone servers (and mongomock) have no change streams
+                print(f"Profile change stream unavailable, polling instead: {e}")
+                break
+            except PyMongoError as e:
+                # Events may have been missed while the stream was down
+                print(f"Profile change stream interrupted: {e}")
+                self.cache.clear()
+                time.sleep(self.poll_interval)
+
+        self.mode = "polling"
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                self._poll(users)
+            except PyMongoError as e:
+                print(f"Error polling profiles: {e}")
+
+    def _watch(self, users):
+        with users.watch(full_document="updateLookup") as stream:
+            for change in stream:
+                email = (change.get("fullDocument") or {}).get("email")
+                if email:
+                    self.cache.invalidate(email)
+                else:
+                    # Deletes only carry the _id, so the email is unknown
+                    self.cache.clear()
+
+    def _poll(self, users):
+        cached = self.cache.cached()
+        if not cached:
+            return
+        current = {
+            doc["email"]: doc
+            for doc in users.find({"email": {"$in": list(cached)}}, {"_id": 0})
+        }
+        for email, profile in cached.items():
+            if current.get(email) != profile:
+                self.cache.invalidate(email)
+
+
+profile_cache = ProfileCache()
+profile_watcher = ProfileWatcher(profile_cache)
@@ -0,0 +1,166 @@
+"""Opt-in per-request profiling.
+
+    @profiled("retirement_report")
+    def get_retirement_report(...): ...
+
+A sampled fraction of calls to a profiled function runs under a profiler
+and leaves one file per request in PROFILE_DIR:
+- "cprofile": deterministic cProfile stats (<name>-<time>.prof, open with
+  pstats or snakeviz)
+- "sampling": a stack sampler that writes folded stacks (<name>-<time>.folded)
+  for flamegraph.pl or speedscope; cheap enough to stay on in production
+
+PROFILE_MAX_PER_MINUTE caps the profiles written whatever the sample rate.
+Only one cProfile runs per process at a time, and a profiler that cannot
+start or write its file never fails the request it wraps.
+configure() changes the mode and rate at runtime, e.g. from an admin action.
+"""
+import cProfile
+import functools
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+
+PROFILE_MODE = os.getenv("PROFILE_MODE", "")
+# Fraction of calls profiled, e.g. 0.01 for 1% of requests
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0.01"))
+PROFILE_MAX_PER_MINUTE = int(os.getenv("PROFILE_MAX_PER_MINUTE", "6"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+# Seconds between stack samples in "sampling" mode
+PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.005"))
+
+MODES = ("", "cprofile", "sampling")
+
+_settings = {"mode": PROFILE_MODE, "rate": PROFILE_SAMPLE_RATE}
+_recent = deque()
+_lock = threading.Lock()
+# A profiled call must not start another profile in nested profiled functions
+_active = threading.local()
+# cProfile hooks the whole interpreter; Python 3.12+ refuses a second active profiler
+_cprofile_lock = threading.Lock()
+
+
+def configure(mode: str | None = None, rate: float | None = None):
+    """Switch profiling on or off at runtime; mode "" disables it"""
+    if mode is not None:
+        if mode not in MODES:
+            raise ValueError(f"Unknown profiling mode: {mode}")
+        _settings["mode"] = mode
+    if rate is not None:
+        _settings["rate"] = rate
+
+
+def _should_profile() -> bool:
+    if not _settings["mode"] or getattr(_active, "on", False):
+        return False
+    if random.random() >= _settings["rate"]:
+        return False
+    now = time.monotonic()
+    with _lock:
+        while _recent and now - _recent[0] > 60:
+            _recent.popleft()
+        if len(_recent) >= PROFILE_MAX_PER_MINUTE:
+            return False
+        _recent.append(now)
+    return True
+
+
+def _output_path(name: str, suffix: str) -> str:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    return os.path.join(PROFILE_DIR, f"{name}-{stamp}-{os.getpid()}{suffix}")
+
+
+class StackSampler:
+    """Samples one thread's Python stack at a fixed interval from a helper thread"""
+
+    def __init__(self, thread_id: int, interval: float = PROFILE_SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+
+def _run_cprofile(name, fn, args, kwargs):
+    # Another request is being profiled; this one runs plainly
+    if not _cprofile_lock.acquire(blocking=False):
+        return fn(*args, **kwargs)
+    try:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except Exception as e:
+            print(f"Error starting profiler for {name}: {str(e)}")
+            return fn(*args, **kwargs)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            profiler.disable()
+            try:
+                profiler.dump_stats(_output_path(name, ".prof"))
+            except Exception as e:
+                print(f"Error writing profile for {name}: {str(e)}")
+    finally:
+        _cprofile_lock.release()
+
+
+def _run_sampling(name, fn, args, kwargs):
+    sampler = StackSampler(threading.get_ident())
+    try:
+        sampler.start()
+    except Exception as e:
+        print(f"Error starting stack sampler for {name}: {str(e)}")
+        return fn(*args, **kwargs)
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        stacks = sampler.stop()
+        try:
+            with open(_output_path(name, ".folded"), "w", encoding="utf-8") as f:
+                for stack, count in stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+        except Exception as e:
+            print(f"Error writing profile for {name}: {str(e)}")
+
+
+def profiled(name: str | None = None):
+    """Decorator that profiles a sampled fraction of calls to fn"""
+    def decorator(fn):
+        profile_name = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _should_profile():
+                return fn(*args, **kwargs)
+            run = _run_cprofile if _settings["mode"] == "cprofile" else _run_sampling
+            _active.on = True
+            try:
+                return run(profile_name, fn, args, kwargs)
+            finally:
+                _active.on = False
+        return wrapper
+    return decorator
@@ -0,0 +1,175 @@
+import json
+import logging
+import os
+
+from dependencies import fields_for
+from llm_provider import get_provider
+
+logger = logging.getLogger(__name__)
+
+# Maximum input tokens (system instruction + prompt) per agent
+PROMPT_TOKEN_BUDGETS = {
+    "retirement": int(os.getenv("PROMPT_BUDGET_RETIREMENT", "1500")),
+    "longevity": int(os.getenv("PROMPT_BUDGET_LONGEVITY", "1200")),
+    "health_cost": int(os.getenv("PROMPT_BUDGET_HEALTH_COST", "1500")),
+    "chat": int(os.getenv("PROMPT_BUDGET_CHAT", "2500")),
+}
+
+# Static instructions, sent as the system instruction so the per-call prompt
+# only carries the profile data
+SYSTEM_PROMPTS = {
+    "retirement": """You are an expert financial advisor specializing in retirement planning. Analyze the user's profile and provide highly personalized strategic recommendations.
+Focus on actionable insights based on their specific situation. The message is a JSON object with the profile and the financial analysis.
+
+Answer with a JSON object whose "sections" list holds the five sections below in order. Each section has a "title" (e.g. "1. CURRENT POSITION ANALYSIS") and "subsections", each with a "title" and its "content". Use clear, professional language without asterisks or bullet characters:
+
+1. CURRENT POSITION ANALYSIS
+Financial Position: current financial standing, income and savings patterns, debt and asset position
+Savings Rate & Timeline: current savings rate, retirement timeline feasibility, progress towards goals
+Portfolio Structure: current asset allocation, risk exposure, investment diversity
+
+2. PERSONALIZED RECOMMENDATIONS
+Strategic Actions: immediate priorities, medium-term objectives, long-term goals
+Investment Framework: asset allocation strategy, risk management approach, rebalancing guidelines
+Financial Optimization: tax efficiency, debt management strategy, savings rate optimization
+
+3. RISK FACTORS & MITIGATION
+Primary Risk Assessment: career and income stability, market exposure, longevity considerations
+Protection Strategies: insurance, emergency fund guidelines, risk mitigation approaches
+
+4. LIFESTYLE CONSIDERATIONS
+Work-Life Integration: career development path, lifestyle sustainability, health and wellness factors
+Family Planning: current family needs, future family considerations, estate planning elements
+
+5. OPTIMIZATION OPPORTUNITIES
+Immediate Enhancements: short-term adjustments, quick-win opportunities, priority actions
+Long-term Optimization: strategic portfolio adjustments, tax efficiency improvements, retirement income optimization
+
+Provide clear, actionable recommendations in every subsection.""",
+
+    "longevity": """As a professional healthcare analyst, provide a comprehensive longevity and health analysis based on the profile JSON in the message.
+Answer with a JSON object whose "sections" list holds the five sections below in order. Each section has:
+- title: the section title without its number
+- key_point: important information in plain text
+- finding: specific finding with numerical values where applicable
+- impact: how this affects longevity/health
+
+REQUIRED SECTIONS:
+1. CURRENT HEALTH ASSESSMENT - present health status, chronic conditions, family history, genetic factors, baseline health metrics
+2. LONGEVITY FACTORS ANALYSIS - base life expectancy, genetic adjustments, lifestyle impacts, environmental factors, socioeconomic influences
+3. RISK STRATIFICATION - primary risk factors, risk severity analysis, cumulative assessment, future trajectory
+4. PROTECTIVE FACTORS - positive behaviors, lifestyle benefits, preventive measures, environmental advantages
+5. DETAILED RECOMMENDATIONS - lifestyle modifications, preventive measures, risk mitigation, health optimization
+
+TEXT FORMATTING:
+- Use plain text for general information
+- Use numerical values where applicable (e.g., "25 years" instead of "twenty-five years")
+- Include source citations in parentheses inside the text (e.g., "CDC, 2023")
+- Format key metrics with specific values (e.g., "Blood Pressure: 120/80 mmHg")
+- Present calculations clearly (e.g., "Base 73 years - 5 years (family history) + 2 years (non-smoker) = 70 years")""",
+
+    "health_cost": """You are a highly knowledgeable health and financial advisor.
+Your task is to generate 15 **unique**, **user-specific**, and **data-driven** recommendations based on the user profile and risk assessment in the message JSON.
+Each recommendation should:
+
+- Refer **directly** to at least one user-specific input (e.g., "with 20000 USD debt", "based on your 1/10 lifestyle score", etc.)
+- Be written as a **single, complete sentence**
+- Include **exact numbers** from the input (e.g., "debt: 20000 USD", "monthly income: 4500 USD"); amounts are in USD, target_retirement_income is USD/month
+- Be **actionable**, **evidence-based**, and where applicable cite a source (e.g., WHO, CDC, NIH)
+- Avoid all forms of repetition or vague suggestions
+
+Use the data **as-is**. Do not round or interpret numbers. Use the original format (e.g., 20000 USD instead of "$20k" or "$20").
+
+Answer with a JSON object whose "recommendations" list holds exactly 15 items, each with the sentence in "text" and the cited source (e.g. "WHO") in "source", and strictly follow the above rules.""",
+}
+
+
+def to_compact_json(data) -> str:
+    """Serialize without indentation or extra whitespace"""
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def compact_profile(user_data: dict, agent: str) -> dict:
+    """Keep only the non-empty fields the agent's narrative depends on"""
+    fields = fields_for(agent, "narrative")
+    return {k: v for k, v in (user_data or {}).items() if k in fields and v not in (None, "", [])}
+
+
+def _truncate_strings(data, limit: int):
+    if isinstance(data, dict):
+        return {k: _truncate_strings(v, limit) for k, v in data.items()}
+    if isinstance(data, list):
+        return [_truncate_strings(v, limit) for v in data]
+    if isinstance(data, str) and len(data) > limit:
+        return data[:limit] + "..."
+    return data
+
+
+def _required_fields(agent: str) -> set:
+    """Profile fields never dropped to fit the budget"""
+    if agent == "chat":
+        return {"name_surname", "email"}
+    return fields_for(agent, "calculation")
+
+
+def fit_to_budget(agent: str, system_instruction: str, payload) -> str:
+    """Serialize payload so the prompt fits the agent's budget.
+
+    Long free-text values are shortened first, then optional profile fields
+    (the payload's "profile" dict, or the payload itself for chat) are
+    dropped, largest first. Raises ValueError if the prompt still does not fit.
+    """
+    budget = PROMPT_TOKEN_BUDGETS[agent]
+    provider = get_provider()
+    prompt = to_compact_json(payload)
+    tokens = provider.count_tokens(system_instruction + prompt)
+    limit = 400
+    while tokens > budget and limit >= 50:
+        payload = _truncate_strings(payload, limit)
+        prompt = to_compact_json(payload)
+        tokens = provider.count_tokens(system_instruction + prompt)
+        limit //= 2
+
+    if tokens > budget:
+        profile = dict(payload.get("profile", payload))
+        required = _required_fields(agent)
+        optional = sorted((k for k in profile if k not in required),
+                          key=lambda k: len(to_compact_json(profile[k])), reverse=True)
+        dropped = []
+        for field in optional:
+            if tokens <= budget:
+                break
+            del profile[field]
+            dropped.append(field)
+            payload = {**payload, "profile": profile} if "profile" in payload else profile
+            prompt = to_compact_json(payload)
+            tokens = provider.count_tokens(system_instruction + prompt)
+        if dropped:
+            logger.warning("Dropped %s from the %s prompt to fit its budget of %d tokens",
+                           ", ".join(dropped), agent, budget)
+
+    if tokens > budget:
+        raise ValueError(f"{agent} prompt uses {tokens} tokens, over its budget of {budget}")
+    return prompt
+
+
+def build_prompt(agent: str, user_data: dict, extra: dict | None = None) -> tuple[str, str]:
+    """Return (system_instruction, prompt) for an agent's narrative call"""
+    payload = {"profile": compact_profile(user_data, agent)}
+    if extra:
+        payload.update(extra)
+    system_instruction = SYSTEM_PROMPTS[agent]
+    return system_instruction, fit_to_budget(agent, system_instruction, payload)
+
+
+def compact_schema(schema: dict) -> str:
+    """One line per field: name:type, options in brackets, * for required"""
+    lines = []
+    for name, spec in schema.items():
+        line = f"{name}:{spec.get('type', 'string')}"
+        if spec.get("options"):
+            line += "[" + "|".join(spec["options"]) + "]"
+        if spec.get("required"):
+            line += "*"
+        lines.append(line)
+    return "\n".join(lines)
@@ -0,0 +1,197 @@
+"""Retirement readiness score, without building a report.
+
+    readiness_score(metrics, profile)          # one profile, as in the PDF
+    columns, skipped = score_users(read_mongo())   # whole collection, columnar
+    python readiness.py --mongo --output readiness.csv --alert-below 40
+
+The score (0-100) adds up financial readiness (40 points), time to
+retirement (20), savings rate (20) and debt management (20). The batch API
+works on columns of NumPy arrays, so scoring and sorting a collection is a
+few vector operations after the profiles are read.
+"""
+import argparse
+import csv
+import sys
+
+import numpy as np
+
+# Annual investment return assumed by every projection
+ANNUAL_RETURN = 0.07
+
+# Profile fields the score needs; users missing one are skipped, not scored as zero
+SCORE_FIELDS = ("age", "monthly_income", "monthly_expenses", "target_retirement_age", "target_retirement_income")
+
+# Lowest score of each status, best first
+READINESS_LEVELS = (
+    (90, "Excellent"),
+    (75, "Good"),
+    (60, "Fair"),
+    (40, "Needs Attention"),
+    (0, "Critical"),
+)
+
+
+def project_savings(age, retirement_age, monthly_savings, current_savings, target_retirement_income,
+                    life_expectancy, annual_return=ANNUAL_RETURN):
+    """(total_retirement_savings, required_savings) at retirement; arguments broadcast as arrays"""
+    retirement_age = np.asarray(retirement_age, dtype=float)
+    annual_return = np.asarray(annual_return, dtype=float)
+    growth = (1 + annual_return) ** np.maximum(retirement_age - np.asarray(age, dtype=float), 1)
+    total_savings = (np.asarray(current_savings, dtype=float) * growth
+                     + np.asarray(monthly_savings, dtype=float) * 12 * (growth - 1) / annual_return)
+    duration = np.maximum(np.asarray(life_expectancy, dtype=float) - retirement_age, 1)
+    required_savings = np.maximum(np.asarray(target_retirement_income, dtype=float) * 12 * duration, 1.0)
+    return total_savings, required_savings
+
+
+def readiness_scores(total_savings, required_savings, age, target_retirement_age,
+                     monthly_income, monthly_expenses, debt) -> np.ndarray:
+    """Readiness scores for arrays of inputs"""
+    total_savings, required_savings, age, target_retirement_age, monthly_income, monthly_expenses, debt = (
+        np.asarray(value, dtype=float) for value in
+        (total_savings, required_savings, age, target_retirement_age, monthly_income, monthly_expenses, debt)
+    )
+    # Financial Readiness (40 points)
+    score = np.where(total_savings >= required_savings, 40.0, total_savings / required_savings * 40)
+
+    # Time to Retirement (20 points)
+    years_to_retire = target_retirement_age - age
+    score = score + np.where(years_to_retire >= 20, 20.0, years_to_retire / 20 * 20)
+
+    # Monthly Savings Rate (20 points)
+    has_income = monthly_income > 0
+    safe_income = np.where(has_income, monthly_income, 1.0)
+    savings_rate = np.where(has_income, (monthly_income - monthly_expenses) / safe_income, 0.0)
+    score = score + np.minimum(savings_rate * 100, 20)
+
+    # Debt Management (20 points)
+    annual_income = monthly_income * 12
+    debt_to_income = debt / np.where(annual_income > 0, annual_income, 1.0)
+    debt_points = np.where(debt_to_income <= 0.3, 20.0, np.maximum(0, (1 - debt_to_income) * 20))
+    score = score + np.where(annual_income > 0, debt_points, 0.0)
+
+    return np.clip(score, 0, 100)
+
+
+def readiness_score(metrics: dict, profile) -> float:
+    """Score of one profile, from the financial_metrics of calculate_financial_readiness"""
+    return float(readiness_scores(
+        metrics['total_retirement_savings'], metrics['required_savings'], profile.age,
+        profile.target_retirement_age, profile.monthly_income, profile.monthly_expenses, profile.debt,
+    ))
+
+
+def readiness_status(score: float) -> str:
+    for threshold, status in READINESS_LEVELS:
+        if score >= threshold:
+            return status
+    return READINESS_LEVELS[-1][1]
+
+
+def readiness_statuses(scores) -> np.ndarray:
+    scores = np.asarray(scores, dtype=float)
+    return np.select([scores >= threshold for threshold, _ in READINESS_LEVELS],
+                     [status for _, status in READINESS_LEVELS], default=READINESS_LEVELS[-1][1])
+
+
+def score_columns(columns: dict) -> dict:
+    """Add financial_ratio, score and status to columns of profile inputs.
+
+    columns maps age, monthly_income, monthly_expenses, debt, current_savings,
+    target_retirement_age, target_retirement_income and life_expectancy to
+    equal-length arrays.
+    """
+    total_savings, required_savings = project_savings(
+        columns["age"], columns["target_retirement_age"],
+        np.asarray(columns["monthly_income"], dtype=float) - np.asarray(columns["monthly_expenses"], dtype=float),
+        columns["current_savings"], columns["target_retirement_income"], columns["life_expectancy"],
+    )
+    scores = readiness_scores(total_savings, required_savings, columns["age"], columns["target_retirement_age"],
+                              columns["monthly_income"], columns["monthly_expenses"], columns["debt"])
+    return {
+        **columns,
+        "financial_ratio": total_savings / required_savings,
+        "score": scores,
+        "status": readiness_statuses(scores),
+    }
+
+
+def score_users(users) -> tuple[dict, dict]:
+    """Columnar scores for an iterable of user dicts (Mongo documents or JSONL rows).
+
+    Only the per-user text parsing (savings, life expectancy) runs in
+    Python; everything after that is vectorized. Returns the columns and
+    the number of users skipped because a SCORE_FIELDS value is missing
+    ("incomplete") or the profile cannot be parsed ("invalid").
+    """
+    # Imported here so the score functions above work without the report stack
+    from agecalculatoragent import RetirementCalculator, UserProfile
+
+    calculator = RetirementCalculator()
+    names = ("age", "monthly_income", "monthly_expenses", "debt", "current_savings",
+             "target_retirement_age", "target_retirement_income", "life_expectancy")
+    rows = {name: [] for name in names}
+    emails = []
+    skipped = {"incomplete": 0, "invalid": 0}
+    for user_data in users:
+        if any(user_data.get(field) in (None, "") for field in SCORE_FIELDS):
+            skipped["incomplete"] += 1
+            continue
+        try:
+            profile = UserProfile.from_dict({k: v for k, v in user_data.items() if v is not None})
+        except (TypeError, ValueError) as e:
+            print(f"Skipping {user_data.get('email')}: {str(e)}")
+            skipped["invalid"] += 1
+            continue
+        emails.append(profile.email)
+        rows["age"].append(profile.age)
+        rows["monthly_income"].append(profile.monthly_income)
+        rows["monthly_expenses"].append(profile.monthly_expenses)
+        rows["debt"].append(profile.debt)
+        rows["current_savings"].append(calculator.current_savings(profile))
+        rows["target_retirement_age"].append(profile.target_retirement_age)
+        rows["target_retirement_income"].append(profile.target_retirement_income)
+        rows["life_expectancy"].append(calculator.calculate_life_expectancy(profile))
+
+    columns = score_columns({name: np.array(values, dtype=float) for name, values in rows.items()})
+    columns["email"] = np.array(emails, dtype=object)
+    return columns, skipped
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Score the retirement readiness of many users")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--input", help="JSONL file with one user profile per line")
+    source.add_argument("--mongo", action="store_true", help="read users from the Mongo user collection")
+    parser.add_argument("--output", help="write email, score, status and financial ratio as CSV, lowest score first")
+    parser.add_argument("--alert-below", type=float, help="list users scoring below this and exit with status 2")
+    args = parser.parse_args(argv)
+
+    from batch_reports import read_jsonl, read_mongo
+    columns, skipped = score_users(read_mongo() if args.mongo else read_jsonl(args.input))
+    order = np.argsort(columns["score"], kind="stable")
+
+    if args.output:
+        with open(args.output, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["email", "score", "status", "financial_ratio"])
+            for i in order:
+                writer.writerow([columns["email"][i], round(float(columns["score"][i]), 1),
+                                 columns["status"][i], round(float(columns["financial_ratio"][i]), 3)])
+
+    statuses, counts = np.unique(columns["status"], return_counts=True)
+    print(f"Scored {len(order)} users: " + ", ".join(f"{s} {c}" for s, c in zip(statuses, counts)))
+    if skipped["incomplete"] or skipped["invalid"]:
+        print(f"Skipped {skipped['incomplete']} users missing a score field and {skipped['invalid']} invalid profiles")
+    if args.alert_below is not None:
+        below = order[columns["score"][order] < args.alert_below]
+        for i in below:
+            print(f"{columns['email'][i]}: {columns['score'][i]:.1f} ({columns['status'][i]})")
+        if below.size:
+            print(f"{below.size} users below {args.alert_below}")
+            return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
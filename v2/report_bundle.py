@@ -0,0 +1,120 @@
+"""Multi-report PDF bundles ("dossiers") for advisors.
+
+A bundle holds every agent's report for one or more profiles. Reports are
+turned into flowables one at a time and fed to reportlab through a small
+window, so only the report being laid out is kept in memory instead of one
+story list for the whole bundle.
+"""
+import os
+import tempfile
+from datetime import datetime
+
+from reportlab.lib.pagesizes import letter
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
+
+from report_theme import HEALTH_STYLES
+from tracing import traced
+from metrics import pdf_metrics
+
+# Flowables buffered ahead of the layout while a bundle is built
+REPORT_BUNDLE_WINDOW = int(os.getenv("REPORT_BUNDLE_WINDOW", "200"))
+# Bytes per chunk when a bundle is streamed to a response
+REPORT_BUNDLE_CHUNK_SIZE = int(os.getenv("REPORT_BUNDLE_CHUNK_SIZE", str(64 * 1024)))
+
+
+class StreamingStory(list):
+    """Story list that is refilled from an iterator as reportlab consumes it.
+
+    SimpleDocTemplate.build takes flowables from the front of the list until
+    it is empty (and puts split parts back at the front), so topping the list
+    up on every length or index check keeps at most `window` flowables alive.
+    """
+
+    def __init__(self, flowables, window: int = REPORT_BUNDLE_WINDOW):
+        super().__init__()
+        self._source = iter(flowables)
+        self._window = window
+        self._fill()
+
+    def _fill(self):
+        while self._source is not None and list.__len__(self) < self._window:
+            try:
+                self.append(next(self._source))
+            except StopIteration:
+                self._source = None
+
+    def __len__(self):
+        self._fill()
+        return list.__len__(self)
+
+    def __getitem__(self, index):
+        self._fill()
+        return list.__getitem__(self, index)
+
+
+def report_flowables(agent_class, user_data: dict) -> list:
+    """Flowables of one agent's report, or [] if it could not be built"""
+    try:
+        agent = agent_class(user_data)
+        # Computes the report (or reads it from the report cache) without writing a PDF
+        agent.handle_query(output_mode="markdown")
+        return agent.pdf_story()
+    except Exception as e:
+        print(f"Error building {agent_class.__name__} for bundle: {str(e)}")
+        return []
+
+
+def bundle_flowables(profiles, agents: dict):
+    """Yield a cover page and every agent's report for each profile, lazily"""
+    first = True
+    for user_data in profiles:
+        if not first:
+            yield PageBreak()
+        first = False
+        yield Paragraph(f"Client Dossier: {user_data.get('name_surname', '')}", HEALTH_STYLES['title'])
+        yield Paragraph(f"Generated: {datetime.now().strftime('%B %d, %Y %H:%M')}", HEALTH_STYLES['normal'])
+        yield Spacer(1, 20)
+        yield Paragraph("Contents: " + ", ".join(agents), HEALTH_STYLES['normal'])
+
+        for agent_class in agents.values():
+            story = report_flowables(agent_class, user_data)
+            if story:
+                yield PageBreak()
+                yield from story
+
+
+@traced("pdf.bundle")
+@pdf_metrics("bundle")
+def write_bundle(profiles, agents: dict, output_path: str) -> str:
+    """Write the bundle for an iterable of profiles to output_path"""
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    doc = SimpleDocTemplate(
+        output_path,
+        pagesize=letter,
+        rightMargin=40,
+        leftMargin=40,
+        topMargin=40,
+        bottomMargin=40
+    )
+    doc.build(StreamingStory(bundle_flowables(profiles, agents)))
+    return output_path
+
+
+def stream_bundle(profiles, agents: dict, chunk_size: int = REPORT_BUNDLE_CHUNK_SIZE):
+    """Yield the bundle as byte chunks, e.g. for a chunked HTTP response.
+
+    The PDF cross-reference table is written last, so the bundle is laid out
+    into a temporary file first and then sent in fixed-size chunks.
+    """
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    os.close(fd)
+    try:
+        write_bundle(profiles, agents, path)
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        os.remove(path)
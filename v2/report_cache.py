@@ -0,0 +1,126 @@
+import hashlib
+import json
+import os
+import threading
+
+from dependencies import affected_sections, fields_for
+from metrics import CACHE_REQUESTS
+
+# Fields that never influence a report and must not end up in the hash
+IGNORED_FIELDS = ("_id", "password")
+
+REPORT = "report"
+
+
+def profile_version(user_data: dict, fields=None) -> str:
+    """Return a stable hash of the canonical profile dict.
+
+    Two profiles with the same field values always produce the same version,
+    regardless of key order. If fields is given, only those fields are hashed.
+    """
+    canonical = {k: v for k, v in (user_data or {}).items() if k not in IGNORED_FIELDS}
+    if fields is not None:
+        canonical = {k: v for k, v in canonical.items() if k in fields}
+    payload = json.dumps(canonical, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ReportCache:
+    """Remember the last report, and the sections it was built from, per user and agent.
+
+    Every entry records the profile version it was built from, so a lookup
+    with a different version is a miss and the entry gets regenerated.
+    Section versions only hash the fields listed in dependencies.py.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, email: str, agent: str, version: str):
+        """Return (report, pdf_path) if a report for this version is stored"""
+        with self._lock:
+            entry = self._entries.get((email, agent, REPORT))
+        if entry is None or entry["version"] != version:
+            CACHE_REQUESTS.inc(cache="report", result="miss")
+            return None
+
+        # The PDF may have been deleted or overwritten by another report since
+        pdf_path = entry["pdf_path"]
+        if pdf_path:
+            if not os.path.exists(pdf_path) or os.path.getmtime(pdf_path) != entry["pdf_mtime"]:
+                self.invalidate(email, agent, REPORT)
+                CACHE_REQUESTS.inc(cache="report", result="miss")
+                return None
+        CACHE_REQUESTS.inc(cache="report", result="hit")
+        return entry["value"], pdf_path
+
+    def put(self, email: str, agent: str, version: str, report: str, pdf_path: str | None):
+        """Store a freshly built report"""
+        pdf_mtime = os.path.getmtime(pdf_path) if pdf_path and os.path.exists(pdf_path) else None
+        with self._lock:
+            self._entries[(email, agent, REPORT)] = {
+                "version": version,
+                "value": report,
+                "pdf_path": pdf_path,
+                "pdf_mtime": pdf_mtime,
+            }
+
+    def get_or_compute(self, email, agent, section, user_data, compute, is_valid=None):
+        """Return a cached section, or compute and store it.
+
+        Args:
+            email: owner of the profile. Without an email nothing is cached.
+            agent: key of REPORT_DEPENDENCIES
+            section: "calculation" or "narrative"
+            user_data: profile dict the section is computed from
+            compute: zero-argument callable that builds the section
+            is_valid: optional predicate; results failing it are returned but not stored
+        """
+        if not email:
+            return compute()
+
+        version = profile_version(user_data, fields_for(agent, section))
+        with self._lock:
+            entry = self._entries.get((email, agent, section))
+        if entry is not None and entry["version"] == version:
+            CACHE_REQUESTS.inc(cache=section, result="hit")
+            return entry["value"]
+
+        CACHE_REQUESTS.inc(cache=section, result="miss")
+        value = compute()
+        if is_valid is None or is_valid(value):
+            self.put_section(email, agent, section, user_data, value)
+        return value
+
+    def put_section(self, email, agent, section, user_data, value):
+        """Store a section computed from user_data"""
+        version = profile_version(user_data, fields_for(agent, section))
+        with self._lock:
+            self._entries[(email, agent, section)] = {"version": version, "value": value}
+
+    def invalidate(self, email: str, agent: str | None = None, section: str | None = None):
+        """Drop stored entries of a user, optionally only for one agent or section"""
+        with self._lock:
+            for key in list(self._entries):
+                if key[0] != email:
+                    continue
+                if agent is not None and key[1] != agent:
+                    continue
+                if section is not None and key[2] != section:
+                    continue
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def invalidate_fields(self, email: str, changed_fields) -> list[tuple[str, str]]:
+        """Drop only the sections that depend on the changed fields"""
+        affected = affected_sections(changed_fields)
+        for agent, section in affected:
+            self.invalidate(email, agent, section)
+        return affected
+
+
+report_cache = ReportCache()
@@ -0,0 +1,69 @@
+"""Markdown and HTML rendering of the reports for the web view.
+
+Agents describe a report as a list of blocks, each a (kind, content) tuple:
+- ("heading", text)
+- ("paragraph", text)
+- ("list", [item, ...])
+- ("table", [header_row, row, ...])
+- ("term", (label, text)): a bold label followed by its text
+"""
+import html
+
+OUTPUT_MODES = ("pdf", "markdown", "html")
+
+
+def _markdown_cell(value) -> str:
+    return str(value).replace("|", "\\|").replace("\n", " ")
+
+
+def to_markdown(blocks) -> str:
+    parts = []
+    for kind, content in blocks:
+        if kind == "heading":
+            parts.append(f"### {content}")
+        elif kind == "paragraph":
+            parts.append(str(content))
+        elif kind == "list":
+            parts.append("\n".join(f"- {item}" for item in content))
+        elif kind == "table":
+            header, *rows = content
+            lines = ["| " + " | ".join(_markdown_cell(c) for c in header) + " |",
+                     "|" + "---|" * len(header)]
+            lines += ["| " + " | ".join(_markdown_cell(c) for c in row) + " |" for row in rows]
+            parts.append("\n".join(lines))
+        elif kind == "term":
+            label, text = content
+            parts.append(f"**{label}:** {text}")
+    return "\n\n".join(parts)
+
+
+def to_html(blocks) -> str:
+    parts = []
+    for kind, content in blocks:
+        if kind == "heading":
+            parts.append(f"<h3>{html.escape(str(content))}</h3>")
+        elif kind == "paragraph":
+            parts.append(f"<p>{html.escape(str(content))}</p>")
+        elif kind == "list":
+            items = "".join(f"<li>{html.escape(str(item))}</li>" for item in content)
+            parts.append(f"<ul>{items}</ul>")
+        elif kind == "table":
+            header, *rows = content
+            head = "".join(f"<th>{html.escape(str(c))}</th>" for c in header)
+            body = "".join(
+                "<tr>" + "".join(f"<td>{html.escape(str(c))}</td>" for c in row) + "</tr>" for row in rows
+            )
+            parts.append(f"<table><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table>")
+        elif kind == "term":
+            label, text = content
+            parts.append(f"<p><strong>{html.escape(str(label))}:</strong> {html.escape(str(text))}</p>")
+    return "\n".join(parts)
+
+
+def render(blocks, output_mode: str) -> str:
+    """Render blocks as "markdown" or "html" """
+    if output_mode == "html":
+        return to_html(blocks)
+    if output_mode == "markdown":
+        return to_markdown(blocks)
+    raise ValueError(f"Unknown output mode: {output_mode}")
@@ -0,0 +1,123 @@
+import json
+from dataclasses import dataclass, field
+from typing import List
+
+from tracing import traced
+
+
+@dataclass
+class InsightSubsection:
+    title: str
+    content: str
+
+
+@dataclass
+class InsightSection:
+    title: str
+    subsections: List[InsightSubsection] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'InsightSection':
+        return cls(
+            title=data["title"].strip(),
+            subsections=[InsightSubsection(s["title"].strip(), s["content"].strip())
+                         for s in data.get("subsections", [])],
+        )
+
+
+@dataclass
+class LongevitySection:
+    title: str
+    key_point: str
+    finding: str
+    impact: str
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'LongevitySection':
+        return cls(**{k: data[k].strip() for k in ("title", "key_point", "finding", "impact")})
+
+
+@dataclass
+class Recommendation:
+    text: str
+    source: str = ""
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Recommendation':
+        return cls(data["text"].strip(), data.get("source", "").strip())
+
+    def __str__(self):
+        return f"{self.text} ({self.source})" if self.source else self.text
+
+
+def _string():
+    return {"type": "string"}
+
+
+def _object(**properties):
+    return {"type": "object", "properties": properties, "required": list(properties)}
+
+
+def _array(items):
+    return {"type": "array", "items": items}
+
+
+# Response schemas passed to the model, keyed by task; the response must be
+# a JSON object matching the schema, so no text post-processing is needed
+RESPONSE_SCHEMAS = {
+    "retirement_insights": _object(sections=_array(_object(
+        title=_string(),
+        subsections=_array(_object(title=_string(), content=_string())),
+    ))),
+    "longevity_analysis": _object(sections=_array(_object(
+        title=_string(), key_point=_string(), finding=_string(), impact=_string(),
+    ))),
+    "health_recommendations": _object(recommendations=_array(_object(
+        text=_string(), source=_string(),
+    ))),
+}
+
+SECTION_TYPES = {
+    "retirement_insights": ("sections", InsightSection),
+    "longevity_analysis": ("sections", LongevitySection),
+    "health_recommendations": ("recommendations", Recommendation),
+}
+
+
+def json_output_config(task: str) -> dict:
+    """Generation config entries that make the model answer with JSON for a task"""
+    return {"response_mime_type": "application/json", "response_schema": RESPONSE_SCHEMAS[task]}
+
+
+@traced("llm.parse_sections")
+def parse_sections(task: str, response_text: str) -> list:
+    """Turn a JSON response into the task's typed section objects.
+
+    Raises ValueError if the response is not valid JSON or misses a field.
+    """
+    key, section_type = SECTION_TYPES[task]
+    try:
+        items = json.loads(response_text)[key]
+        return [section_type.from_dict(item) for item in items]
+    except (TypeError, KeyError, AttributeError, json.JSONDecodeError) as e:
+        raise ValueError(f"Invalid {task} response: {str(e)}")
+
+
+def insights_to_text(sections: List[InsightSection]) -> str:
+    """Plain text form of the retirement insights, for the chat output"""
+    blocks = []
+    for section in sections:
+        lines = [section.title]
+        for sub in section.subsections:
+            lines.append(f"{sub.title}: {sub.content}")
+        blocks.append("\n".join(lines))
+    return "\n\n".join(blocks)
+
+
+def longevity_to_text(sections: List[LongevitySection]) -> str:
+    """Plain text form of the longevity analysis, for the chat output"""
+    return "\n\n".join(
+        f"{i}. {s.title}\n• Key Point: {s.key_point}\n• Finding: {s.finding}\n• Impact: {s.impact}"
+        for i, s in enumerate(sections, 1)
+    )
+
@@ -0,0 +1,472 @@
+"""Paragraph and table styles of the PDF reports.
+
+Everything here is built once at import time and shared by all renderers,
+so a report only creates the table commands that depend on its data.
+"""
+from functools import lru_cache
+
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER, TA_LEFT
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import TableStyle
+
+BASE_STYLES = getSampleStyleSheet()
+
+STATUS_GOOD = colors.HexColor('#27AE60')
+STATUS_WARNING = colors.HexColor('#F1C40F')
+STATUS_BAD = colors.HexColor('#E74C3C')
+
+
+@lru_cache(maxsize=None)
+def striped_rows(first_row: int, row_count: int, color: str, first_col: int = 0, last_col: int = -1) -> tuple:
+    """Background commands for every other row, starting at first_row"""
+    background = colors.HexColor(color)
+    return tuple(('BACKGROUND', (first_col, i), (last_col, i), background)
+                 for i in range(first_row, row_count, 2))
+
+
+# Retirement report
+
+_retirement_section = ParagraphStyle(
+    'Section',
+    parent=BASE_STYLES['Heading2'],
+    fontSize=18,
+    spaceBefore=20,
+    spaceAfter=12,
+    textColor=colors.HexColor('#2874A6'),
+    fontName='Helvetica-Bold'
+)
+_retirement_content = ParagraphStyle(
+    'Content',
+    parent=BASE_STYLES['Normal'],
+    fontSize=11,
+    spaceBefore=5,
+    spaceAfter=5,
+    textColor=colors.HexColor('#2C3E50'),
+    fontName='Helvetica'
+)
+_retirement_description = ParagraphStyle(
+    'Description',
+    parent=_retirement_content,
+    fontSize=10,
+    textColor=colors.HexColor('#34495E'),
+    spaceBefore=10,
+    spaceAfter=10
+)
+_retirement_insights = ParagraphStyle(
+    'Insights',
+    parent=_retirement_description,
+    fontSize=10,
+    textColor=colors.HexColor('#2C3E50'),
+    spaceBefore=6,
+    spaceAfter=6,
+    leading=14
+)
+
+RETIREMENT_STYLES = {
+    'title': ParagraphStyle(
+        'CustomTitle',
+        parent=BASE_STYLES['Heading1'],
+        fontSize=28,
+        spaceAfter=30,
+        alignment=TA_CENTER,
+        textColor=colors.HexColor('#1A5276'),
+        fontName='Helvetica-Bold'
+    ),
+    'subtitle': ParagraphStyle(
+        'Subtitle',
+        parent=BASE_STYLES['Normal'],
+        fontSize=14,
+        spaceAfter=20,
+        alignment=TA_CENTER,
+        textColor=colors.HexColor('#2C3E50'),
+        fontName='Helvetica'
+    ),
+    'congrat': ParagraphStyle(
+        'Congrat',
+        parent=BASE_STYLES['Normal'],
+        fontSize=12,
+        textColor=colors.HexColor('#117A65'),
+        spaceAfter=16,
+        alignment=TA_LEFT
+    ),
+    'section': _retirement_section,
+    'subsection': ParagraphStyle(
+        'Subsection',
+        parent=BASE_STYLES['Heading3'],
+        fontSize=14,
+        spaceBefore=15,
+        spaceAfter=10,
+        textColor=colors.HexColor('#2E86C1'),
+        fontName='Helvetica-Bold'
+    ),
+    'content': _retirement_content,
+    'description': _retirement_description,
+    'scenario_title': ParagraphStyle(
+        'ScenarioTitle',
+        parent=_retirement_section,
+        fontSize=20,
+        textColor=colors.HexColor('#1A5276'),
+        spaceBefore=15,
+        spaceAfter=20,
+        borderWidth=2,
+        borderColor=colors.HexColor('#2874A6'),
+        borderPadding=10,
+        alignment=TA_CENTER
+    ),
+    'scenarios_description': ParagraphStyle(
+        'ScenariosDescription',
+        parent=_retirement_description,
+        fontSize=9,
+        textColor=colors.HexColor('#2C3E50'),
+        spaceBefore=12,
+        spaceAfter=12,
+        borderWidth=1,
+        borderColor=colors.HexColor('#BDC3C7'),
+        borderPadding=10,
+        borderRadius=8
+    ),
+    'insights_title': ParagraphStyle(
+        'InsightsTitle',
+        parent=_retirement_section,
+        fontSize=20,
+        textColor=colors.HexColor('#1A5276'),
+        spaceBefore=15,
+        spaceAfter=20,
+        borderWidth=2,
+        borderColor=colors.HexColor('#1A5276'),
+        borderPadding=10,
+        alignment=TA_CENTER
+    ),
+    'insight_section': ParagraphStyle(
+        'SectionTitle',
+        parent=_retirement_insights,
+        fontSize=12,
+        textColor=colors.HexColor('#1A5276'),
+        fontName='Helvetica-Bold',
+        spaceBefore=12,
+        spaceAfter=6
+    ),
+    'insight_subsection': ParagraphStyle(
+        'SubsectionTitle',
+        parent=_retirement_insights,
+        fontSize=11,
+        textColor=colors.HexColor('#2C3E50'),
+        fontName='Helvetica-Bold',
+        spaceBefore=8,
+        spaceAfter=4
+    ),
+    'insight_content': ParagraphStyle(
+        'Content',
+        parent=_retirement_insights,
+        fontSize=10,
+        textColor=colors.HexColor('#2C3E50'),
+        spaceBefore=2,
+        spaceAfter=4,
+        leading=14
+    ),
+    'disclaimer': ParagraphStyle(
+        'Disclaimer',
+        parent=BASE_STYLES['Normal'],
+        fontSize=9,
+        textColor=colors.HexColor('#7F8C8D'),
+        alignment=TA_CENTER,
+        spaceBefore=20
+    ),
+}
+
+PROFILE_TABLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2874A6')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 12),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#F8F9F9')),
+    ('TEXTCOLOR', (0, 1), (-1, -1), colors.HexColor('#2C3E50')),
+    ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#BDC3C7')),
+    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 1), (-1, -1), 10),
+    ('TOPPADDING', (0, 0), (-1, -1), 6),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+    ('LEFTPADDING', (0, 0), (-1, -1), 8),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 8),
+])
+
+# Category backgrounds, status colors and row stripes are added per report
+KEY_METRICS_TABLE = TableStyle([
+    # Header style
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2874A6')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 11),
+
+    # General cell styling
+    ('ALIGN', (2, 1), (2, -1), 'RIGHT'),  # Right align values
+    ('ALIGN', (3, 1), (3, -1), 'CENTER'),  # Center align status
+    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 1), (-1, -1), 10),
+
+    # Grid styling
+    ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#BDC3C7')),
+    ('LINEBELOW', (0, 0), (-1, 0), 2, colors.HexColor('#2874A6')),
+
+    # Padding
+    ('TOPPADDING', (0, 0), (-1, -1), 6),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+    ('LEFTPADDING', (0, 0), (-1, -1), 8),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 8),
+
+    # Merge cells for categories
+    ('SPAN', (0, 1), (0, 1)),  # Retirement Readiness
+    ('SPAN', (0, 2), (0, 5)),  # Core Financials
+    ('SPAN', (0, 6), (0, 11)),  # Retirement Projections
+    ('SPAN', (0, 12), (0, 14)), # Income Replacement
+    ('SPAN', (0, 15), (0, 17)), # Risk Metrics
+])
+KEY_METRICS_CATEGORY = colors.HexColor('#EBF5FB')
+
+# Status backgrounds, row stripes and the base plan highlight are added per report
+SCENARIOS_TABLE = TableStyle([
+    # Header style
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1A5276')),  # Darker blue
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 10),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+
+    # Grid styling
+    ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#BDC3C7')),
+    ('LINEBELOW', (0, 0), (-1, 0), 2, colors.HexColor('#1A5276')),
+    ('BOX', (0, 0), (-1, -1), 2, colors.HexColor('#1A5276')),
+
+    # Data styling
+    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 1), (-1, -1), 9),
+    ('ALIGN', (1, 1), (-1, -1), 'CENTER'),
+
+    # Enhanced padding
+    ('TOPPADDING', (0, 0), (-1, -1), 8),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+    ('LEFTPADDING', (0, 0), (-1, -1), 8),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 8),
+
+    # Strategy name styling
+    ('ALIGN', (0, 1), (0, -1), 'LEFT'),
+    ('FONTNAME', (0, 1), (0, -1), 'Helvetica-Bold'),
+])
+SCENARIO_BACKGROUNDS = {
+    "STRONG": colors.HexColor('#E8F6F3'),
+    "STABLE": colors.HexColor('#FCF3CF'),
+    "ATTENTION": colors.HexColor('#FADBD8'),
+}
+BASE_PLAN_HIGHLIGHT = ('BACKGROUND', (0, 1), (3, 1), colors.HexColor('#EBF5FB'))
+
+# Text color of each readiness.READINESS_LEVELS status
+READINESS_COLORS = {
+    "Excellent": colors.HexColor('#27AE60'),
+    "Good": colors.HexColor('#2ECC71'),
+    "Fair": colors.HexColor('#F1C40F'),
+    "Needs Attention": colors.HexColor('#E67E22'),
+    "Critical": colors.HexColor('#E74C3C'),
+}
+
+# Sensitivity (tornado) table; the bars in the last column are drawings
+TORNADO_TABLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2874A6')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 10),
+    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 1), (-1, -1), 9),
+    ('ALIGN', (1, 1), (-2, -1), 'CENTER'),
+    ('ALIGN', (-1, 1), (-1, -1), 'CENTER'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#BDC3C7')),
+    ('TOPPADDING', (0, 0), (-1, -1), 5),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
+])
+TORNADO_DOWN = colors.HexColor('#E74C3C')
+TORNADO_UP = colors.HexColor('#27AE60')
+TORNADO_AXIS = colors.HexColor('#2C3E50')
+
+
+# Longevity and health cost reports
+
+_health_normal = ParagraphStyle(
+    'CustomNormal',
+    parent=BASE_STYLES['Normal'],
+    fontSize=10,
+    textColor=colors.HexColor('#2C3E50'),  # Professional dark gray
+    fontName='Helvetica',
+    leading=14  # Line spacing
+)
+
+HEALTH_STYLES = {
+    'title': ParagraphStyle(
+        'CustomTitle',
+        parent=BASE_STYLES['Heading1'],
+        fontSize=24,
+        spaceAfter=30,
+        alignment=1,  # Center alignment
+        textColor=colors.HexColor('#1A5276'),  # Professional blue
+        fontName='Helvetica-Bold'
+    ),
+    'heading': ParagraphStyle(
+        'CustomHeading',
+        parent=BASE_STYLES['Heading2'],
+        fontSize=16,
+        spaceAfter=12,
+        textColor=colors.HexColor('#2874A6'),  # Slightly lighter blue
+        fontName='Helvetica-Bold',
+        borderPadding=10,
+        borderWidth=1,
+        borderColor=colors.HexColor('#AED6F1'),  # Light blue border
+        borderRadius=5
+    ),
+    'subheading': ParagraphStyle(
+        'SubHeading',
+        parent=BASE_STYLES['Heading3'],
+        fontSize=12,
+        spaceAfter=8,
+        textColor=colors.HexColor('#34495E'),  # Dark gray
+        fontName='Helvetica-Bold'
+    ),
+    'normal': _health_normal,
+    'bullet': ParagraphStyle(
+        'Bullet',
+        parent=_health_normal,
+        leftIndent=20,
+        firstLineIndent=-20,
+        spaceBefore=4,
+        spaceAfter=4
+    ),
+    'source': ParagraphStyle(
+        'SourceStyle',
+        parent=BASE_STYLES['Normal'],
+        fontSize=8,
+        textColor=colors.HexColor('#7F8C8D'),  # Light gray
+        spaceBefore=2,
+        spaceAfter=6,
+        fontName='Helvetica-Oblique'
+    ),
+    'disclaimer': ParagraphStyle(
+        'Disclaimer',
+        parent=_health_normal,
+        fontSize=8,
+        textColor=colors.HexColor('#7F8C8D'),
+        borderPadding=10,
+        borderWidth=1,
+        borderColor=colors.HexColor('#BDC3C7'),
+        borderRadius=5
+    ),
+    'longevity_footer': ParagraphStyle(
+        'Footer',
+        parent=_health_normal,
+        fontSize=8,
+        textColor=colors.HexColor('#95A5A6'),
+        alignment=1  # Center alignment
+    ),
+    'key_point': ParagraphStyle(
+        'KeyPoint',
+        parent=_health_normal,
+        fontName='Helvetica-Bold',
+        textColor=colors.HexColor('#1A5276'),
+        fontSize=11
+    ),
+    'finding': ParagraphStyle(
+        'Finding',
+        parent=_health_normal,
+        fontName='Helvetica',
+        textColor=colors.HexColor('#2874A6'),
+        fontSize=10
+    ),
+    'impact': ParagraphStyle(
+        'Impact',
+        parent=_health_normal,
+        fontName='Helvetica-Oblique',
+        textColor=colors.HexColor('#34495E'),
+        fontSize=10
+    ),
+}
+# The health cost footer is the source style, centered
+HEALTH_STYLES['health_cost_footer'] = ParagraphStyle(
+    'Footer',
+    parent=HEALTH_STYLES['source'],
+    alignment=1  # Center alignment
+)
+
+# Header row plus white body; add striped_rows(2, len(data), '#F8FBFD') per table
+DATA_TABLE = TableStyle([
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#BDC3C7')),
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2874A6')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#FFFFFF')),
+    ('TEXTCOLOR', (0, 1), (-1, -1), colors.HexColor('#2C3E50')),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 0), (-1, -1), 9),
+    ('PADDING', (0, 0), (-1, -1), 6),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+])
+DATA_STRIPE = '#F8FBFD'
+
+SUMMARY_TABLE = TableStyle([
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#BDC3C7')),
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2874A6')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#EBF5FB')),
+    ('TEXTCOLOR', (0, 1), (-1, -1), colors.HexColor('#2C3E50')),
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('PADDING', (0, 0), (-1, -1), 8),
+    ('ALIGN', (1, 1), (1, -1), 'RIGHT'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+])
+
+# Two columns: label, value
+LABEL_VALUE_TABLE = TableStyle([
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#BDC3C7')),  # Lighter grid
+    ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#F5F8FA')),  # Light blue-gray
+    ('BACKGROUND', (1, 0), (1, -1), colors.HexColor('#FFFFFF')),  # White
+    ('TEXTCOLOR', (0, 0), (-1, -1), colors.HexColor('#2C3E50')),  # Dark gray text
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('PADDING', (0, 0), (-1, -1), 8),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+])
+
+HIGHLIGHT_VALUE_TABLE = TableStyle([
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#BDC3C7')),
+    ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#F5F8FA')),
+    ('BACKGROUND', (1, 0), (1, -1), colors.HexColor('#EBF5FB')),  # Light blue background for cost
+    ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor('#2C3E50')),
+    ('TEXTCOLOR', (1, 0), (1, -1), colors.HexColor('#2874A6')),  # Blue for cost
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (0, -1), 10),
+    ('FONTSIZE', (1, 0), (1, -1), 14),  # Larger font for cost
+    ('PADDING', (0, 0), (-1, -1), 12),
+    ('ALIGN', (1, 0), (1, -1), 'RIGHT'),  # Right align the cost
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+])
+
+# Header row with paragraphs in every cell; add striped_rows(2, len(data), '#F8FBFD')
+CALCULATION_TABLE = TableStyle([
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#BDC3C7')),
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2874A6')),  # Header background
+    ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#FFFFFF')),  # Content background
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.HexColor('#FFFFFF')),  # Header text color
+    ('TEXTCOLOR', (0, 1), (-1, -1), colors.HexColor('#2C3E50')),  # Content text color
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),  # Header font
+    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),  # Content font
+    ('FONTSIZE', (0, 0), (-1, 0), 10),  # Header font size
+    ('FONTSIZE', (0, 1), (-1, -1), 9),  # Content font size
+    ('PADDING', (0, 0), (-1, -1), 8),
+    ('ALIGN', (2, 1), (2, -1), 'RIGHT'),  # Right align values
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+])
@@ -0,0 +1,81 @@
+"""The vectorized readiness score matches the per-profile score the report used to compute."""
+import random
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from readiness import project_savings, readiness_score, readiness_status, score_columns
+
+
+def scalar_score(metrics: dict, profile) -> float:
+    """The readiness score as RetirementCalculator computed it before readiness.py"""
+    score = 0
+    # Financial Readiness (40 points)
+    if metrics['total_retirement_savings'] >= metrics['required_savings']:
+        score += 40
+    else:
+        score += (metrics['total_retirement_savings'] / metrics['required_savings']) * 40
+
+    # Time to Retirement (20 points)
+    years_to_retire = profile.target_retirement_age - profile.age
+    score += 20 if years_to_retire >= 20 else (years_to_retire / 20) * 20
+
+    # Monthly Savings Rate (20 points)
+    monthly_savings = profile.monthly_income - profile.monthly_expenses
+    savings_rate = monthly_savings / profile.monthly_income if profile.monthly_income > 0 else 0
+    score += min(savings_rate * 100, 20)
+
+    # Debt Management (20 points)
+    annual_income = profile.monthly_income * 12
+    if annual_income > 0:
+        debt_to_income = profile.debt / annual_income
+        score += 20 if debt_to_income <= 0.3 else max(0, (1 - debt_to_income) * 20)
+
+    return min(100, max(0, score))
+
+
+def random_profiles(count: int, seed: int = 1) -> list:
+    rng = random.Random(seed)
+    return [
+        SimpleNamespace(
+            age=rng.randint(20, 64),
+            monthly_income=rng.choice([0, 2000, 5000, 9000]),
+            monthly_expenses=rng.randint(500, 9000),
+            debt=rng.choice([0, 5000, 50000, 200000]),
+            current_savings=rng.randint(0, 300000),
+            target_retirement_age=rng.randint(55, 70),
+            target_retirement_income=rng.randint(0, 8000),
+            life_expectancy=rng.randint(70, 90),
+        )
+        for _ in range(count)
+    ]
+
+
+def metrics_for(profile) -> dict:
+    total_savings, required_savings = project_savings(
+        profile.age, profile.target_retirement_age, profile.monthly_income - profile.monthly_expenses,
+        profile.current_savings, profile.target_retirement_income, profile.life_expectancy,
+    )
+    return {"total_retirement_savings": float(total_savings), "required_savings": float(required_savings)}
+
+
+def test_readiness_score_matches_scalar_score():
+    for profile in random_profiles(300):
+        metrics = metrics_for(profile)
+        assert readiness_score(metrics, profile) == pytest.approx(scalar_score(metrics, profile), abs=1e-9)
+
+
+def test_score_columns_match_scalar_score():
+    profiles = random_profiles(300, seed=2)
+    names = ("age", "monthly_income", "monthly_expenses", "debt", "current_savings",
+             "target_retirement_age", "target_retirement_income", "life_expectancy")
+    columns = score_columns({name: np.array([getattr(p, name) for p in profiles], dtype=float) for name in names})
+
+    for i, profile in enumerate(profiles):
+        metrics = metrics_for(profile)
+        expected = scalar_score(metrics, profile)
+        assert columns["score"][i] == pytest.approx(expected, abs=1e-9)
+        assert columns["status"][i] == readiness_status(expected)
+        assert columns["financial_ratio"][i] == pytest.approx(
+            metrics["total_retirement_savings"] / metrics["required_savings"])
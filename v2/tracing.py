@@ -0,0 +1,193 @@
+"""Lightweight request tracing.
+
+    with span("mongo.get_user", email=email) as s:
+        ...
+        s.set_attribute("found", user is not None)
+
+    @traced("app.report", agent="retirement")
+    def get_retirement_report(...): ...
+
+Spans nest through a context variable, so a span opened inside another one
+becomes its child and shares its trace id. Finished spans are exported from
+a background thread to a JSONL file or an OTLP/HTTP collector; with
+TRACE_EXPORT unset, span() returns a shared no-op span.
+"""
+import atexit
+import contextvars
+import functools
+import json
+import os
+import queue
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+
+# "jsonl" appends spans to TRACE_FILE, "otlp" posts them to TRACE_OTLP_ENDPOINT
+TRACE_EXPORT = os.getenv("TRACE_EXPORT", "")
+TRACE_FILE = os.getenv("TRACE_FILE", "traces.jsonl")
+TRACE_OTLP_ENDPOINT = os.getenv("TRACE_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+TRACE_SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "retirement-assistant")
+# Spans sent per write/request, and the longest a finished span waits to be sent
+TRACE_BATCH_SIZE = 100
+TRACE_FLUSH_INTERVAL = 2.0
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, name: str, parent: "Span | None", attributes: dict):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent else None
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = attributes
+        self.error = None
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class _NoopSpan:
+    def set_attribute(self, key, value):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp(spans: list) -> dict:
+    """OTLP/HTTP JSON body for a batch of finished spans"""
+    return {"resourceSpans": [{
+        "resource": {"attributes": [{"key": "service.name", "value": _otlp_value(TRACE_SERVICE_NAME)}]},
+        "scopeSpans": [{
+            "scope": {"name": "tracing"},
+            "spans": [{
+                "traceId": s.trace_id,
+                "spanId": s.span_id,
+                "parentSpanId": s.parent_id or "",
+                "name": s.name,
+                "kind": 1,
+                "startTimeUnixNano": str(s.start_ns),
+                "endTimeUnixNano": str(s.end_ns),
+                "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in s.attributes.items()],
+                "status": {"code": 2, "message": s.error} if s.error else {"code": 1},
+            } for s in spans],
+        }],
+    }]}
+
+
+class SpanExporter:
+    """Batches finished spans and writes them from a daemon thread"""
+
+    def __init__(self, mode: str):
+        self.mode = mode
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def export(self, span: Span):
+        self._queue.put(span)
+
+    def _drain(self) -> list:
+        spans = []
+        while len(spans) < TRACE_BATCH_SIZE:
+            try:
+                spans.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return spans
+
+    def _run(self):
+        while True:
+            time.sleep(TRACE_FLUSH_INTERVAL)
+            self.flush()
+
+    def flush(self):
+        # The exporter thread and atexit may flush at the same time
+        with self._lock:
+            spans = self._drain()
+            while spans:
+                try:
+                    self._write(spans)
+                except Exception as e:
+                    print(f"Error exporting spans: {str(e)}")
+                spans = self._drain()
+
+    def _write(self, spans: list):
+        if self.mode == "otlp":
+            request = urllib.request.Request(
+                TRACE_OTLP_ENDPOINT,
+                data=json.dumps(to_otlp(spans)).encode("utf-8"),
+                headers={"Content-Type": "application/json"},
+            )
+            urllib.request.urlopen(request, timeout=5).close()
+        else:
+            with open(TRACE_FILE, "a", encoding="utf-8") as f:
+                for s in spans:
+                    f.write(json.dumps(s.to_dict(), default=str) + "\n")
+
+
+exporter = SpanExporter(TRACE_EXPORT) if TRACE_EXPORT in ("jsonl", "otlp") else None
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Time a block as a child of the current span"""
+    if exporter is None:
+        yield NOOP_SPAN
+        return
+
+    current = Span(name, _current_span.get(), attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current.end_ns = time.time_ns()
+        _current_span.reset(token)
+        exporter.export(current)
+
+
+def traced(name: str | None = None, **attributes):
+    """Decorator form of span(); the name defaults to the function's qualified name"""
+    def decorator(fn):
+        span_name = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(span_name, **attributes):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator